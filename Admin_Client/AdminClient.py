@@ -1,5 +1,6 @@
 import socket
 import json
+from typing import List
 from KeyManager import KeyManager
 from DiplomaGenerator import DiplomaGenerator
 
@@ -36,6 +37,30 @@ class BlockchainClient:
         self.password = password
         return self.send_command(command)
 
+    def add_blocks(self, diplomas: List[DiplomaGenerator]) -> dict:
+        """Отправить пакет подписанных дипломов одной командой ADD_BLOCKS"""
+        batch = {
+            "public_key": self.key_manager.get_public_pem(),
+            "diplomas": [
+                {"diploma_data": diploma.to_dict(), "signature": diploma.data['signature']}
+                for diploma in diplomas
+            ]
+        }
+        command = f"LOGIN {self.username} {self.password}\r\nADD_BLOCKS {json.dumps(batch)}\r\n\r\n"
+        try:
+            with self.connect() as sock:
+                sock.sendall(command.encode('utf-8'))
+                # Ответ содержит статус по каждому диплому и может быть большим
+                response = b""
+                while b"\r\n\r\n" not in response:
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    response += chunk
+                return self.parse_response(response.decode('utf-8'))
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
     @staticmethod
     def parse_response(response: str) -> dict:
         """Парсинг ответа сервера"""
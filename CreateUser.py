@@ -1,7 +1,7 @@
 import bcrypt
-import json
-import os
 from typing import List, Dict
+from Server.models import User
+from Server.handlers.auth_handler import UserStore
 
 ROLES = ['admin', 'miner']  # Removed viewer
 
@@ -37,10 +37,13 @@ def select_role() -> str:
 def create_user():
     """Create new user with role assignment"""
     # Load existing users
-    users = []
-    if os.path.exists('users.json'):
-        with open('users.json', 'r') as f:
-            users = json.load(f)
+    store = UserStore('users.json')
+    try:
+        store.reload()
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return
+    users = [{"username": name} for name in store.users]
 
     # Get user input
     username = get_valid_username(users)
@@ -61,9 +64,7 @@ def create_user():
     }
 
     # Save to file
-    users.append(user_data)
-    with open('users.json', 'w') as f:
-        json.dump(users, f, indent=4, sort_keys=True)
+    store.add_user(User(**user_data))
 
     print(f"\nUser '{username}' created successfully!")
     print(f"Role: {role.capitalize()}")
@@ -106,7 +106,7 @@ class MinerGUI:
     def stop_mining(self):
         self.running = False
         if self.client:
-            self.client.mining = False
+            self.client.stop_mining()
         self.start_btn.config(text="Старт")
         self.log("Майнинг остановлен")
 
@@ -124,7 +124,6 @@ class MinerGUI:
     def mining_loop(self):
         self.client.start_mining()
         last_update = 0
-        hashes = 0
         task_check_interval = 2  # Проверка наличия задач каждые 2 секунды
         last_task_check = 0
 
@@ -133,12 +132,10 @@ class MinerGUI:
                 # Логика обновления статуса
                 if self.client.current_task:
                     self.update_status(self.client.current_task)
-                    hashes += self.client.current_task['nonce_end'] - self.client.current_task['nonce_start']
 
                     # Обновление скорости
                     if int(current_time()) - last_update >= 1:
-                        self.status_labels['speed'].config(text=f"Скорость: {hashes} H/s")
-                        hashes = 0
+                        self.status_labels['speed'].config(text=f"Скорость: {self.client.hash_rate:.0f} H/s")
                         last_update = int(current_time())
                 else:
                     self.update_status(None)
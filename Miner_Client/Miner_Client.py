@@ -1,34 +1,49 @@
 import socket
 import json
+import argparse
 import getpass
-import hashlib
-from threading import Thread
+from threading import Event, Thread
 from time import sleep
 from time import time as current_time
+from MiningEngine import MiningEngine
 
 
 class MinerClient:
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, workers: int = None):
         self.host = host
         self.port = port
+        self.workers = workers
+        self.engine = None
         self.username = None
         self.password = None
+        self.token = None
         self.current_task = None
         self.mining = False
         self.check_interval = 30
         self.last_check = int(current_time())
+        # Измеренная скорость и периодический отчет серверу
+        self.hash_rate = 0.0
+        self.report_interval = 10
+        self.last_report = current_time()
+        self._report_hashes = 0
+        self._report_seconds = 0.0
+        # Точка последнего замера живого счетчика движка
+        self._sample_hashes = 0
+        self._sample_time = current_time()
+        # Подписка на события сервера (SUBSCRIBE)
+        self.subscribed = False
+        self.queue_changed = Event()
+        self.idle_wait = 5.0
+        self.resubscribe_delay = 1.0
+        self._event_thread = None
+        self._event_stop = Event()
 
     def connect(self):
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.connect((self.host, self.port))
         return sock
 
-    def send_command(self, command: str) -> dict:
-        """Отправка команды с автоматическим добавлением LOGIN"""
-        if not self.username or not self.password:
-            return {"status": "error", "message": "Credentials not set"}
-
-        full_command = f"LOGIN {self.username} {self.password}\r\n{command}\r\n\r\n"
+    def _send_raw(self, full_command: str) -> dict:
         try:
             with self.connect() as sock:
                 sock.sendall(full_command.encode('utf-8'))
@@ -37,19 +52,31 @@ class MinerClient:
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def send_command(self, command: str) -> dict:
+        """Отправка команды с токеном сессии (AUTH) или LOGIN"""
+        if not self.username or not self.password:
+            return {"status": "error", "message": "Credentials not set"}
+
+        if self.token:
+            response = self._send_raw(f"AUTH {self.token}\r\n{command}\r\n\r\n")
+            if not (response.get("status") == "ERROR" and response.get("code") == "403"):
+                return response
+            # Сессия истекла - повторный вход
+            self.login()
+
+        if self.token:
+            return self._send_raw(f"AUTH {self.token}\r\n{command}\r\n\r\n")
+        return self._send_raw(f"LOGIN {self.username} {self.password}\r\n{command}\r\n\r\n")
+
     def login(self) -> dict:
-        """Отправка команды с автоматическим добавлением LOGIN"""
+        """Вход по LOGIN и сохранение токена сессии"""
         if not self.username or not self.password:
             return {"status": "error", "message": "Credentials not set"}
 
-        full_command = f"LOGIN {self.username} {self.password}\r\n\r\n"
-        try:
-            with self.connect() as sock:
-                sock.sendall(full_command.encode('utf-8'))
-                response = sock.recv(4096).decode('utf-8')
-                return self.parse_response(response)
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+        response = self._send_raw(f"LOGIN {self.username} {self.password}\r\n\r\n")
+        data = response.get("data")
+        self.token = data.get("token") if isinstance(data, dict) else None
+        return response
 
     @staticmethod
     def parse_response(response: str) -> dict:
@@ -72,25 +99,92 @@ class MinerClient:
 
     def start_mining(self):
         self.mining = True
+        if self.engine is None:
+            self.engine = MiningEngine(self.workers)
         Thread(target=self._mining_loop, daemon=True).start()
 
+        # Поток подписки прошлого запуска должен завершиться до нового,
+        # иначе после быстрого stop/start их будет два
+        if self._event_thread and self._event_thread.is_alive():
+            self._event_stop.set()
+            self._event_thread.join()
+        self._event_stop = Event()
+        self._event_thread = Thread(target=self._event_loop, args=(self._event_stop,), daemon=True)
+        self._event_thread.start()
+
+    def stop_mining(self):
+        self.mining = False
+        self._event_stop.set()
+        if self.engine:
+            self.engine.cancel()
+
     def _mining_loop(self):
         while self.mining:
 
-            if int(current_time()) - self.last_check > self.check_interval:
+            if not self.subscribed and int(current_time()) - self.last_check > self.check_interval:
                 self._check_task_status()
                 self.last_check = int(current_time())
 
             if not self.current_task:
+                self.queue_changed.clear()
                 self._get_task()
 
 
             if self.current_task:
                 self._process_task()
+            elif self.subscribed:
+                # Очередь пуста: ждем QUEUE_CHANGED вместо частого опроса MINE
+                self.queue_changed.wait(self.idle_wait)
 
 
             sleep(0.1)
 
+    def _event_loop(self, stop: Event):
+        """Поток событий SUBSCRIBE; при разрыве соединения переподписывается"""
+        while not stop.is_set():
+            try:
+                with self.connect() as sock:
+                    sock.sendall(b"SUBSCRIBE BLOCK_COMMITTED TASK_INVALIDATED QUEUE_CHANGED\r\n\r\n")
+                    sock.settimeout(1.0)
+                    buffer = b""
+                    while not stop.is_set():
+                        try:
+                            data = sock.recv(4096)
+                        except socket.timeout:
+                            continue
+                        if not data:
+                            break
+
+                        buffer += data
+                        while b"\r\n\r\n" in buffer:
+                            raw, sep, buffer = buffer.partition(b"\r\n\r\n")
+                            self._handle_event(self.parse_response(raw.decode('utf-8')))
+            except OSError as e:
+                print(f"[WARNING] Подписка на события недоступна: {e}")
+            self.subscribed = False
+            stop.wait(self.resubscribe_delay)
+
+    def _handle_event(self, event: dict):
+        status = event.get("status")
+        if status == "OK":
+            self.subscribed = True
+            return
+        if status != "EVENT":
+            print(f"[WARNING] Ошибка подписки: {event}")
+            return
+
+        event_type = event.get("code")
+        data = event.get("data") if isinstance(event.get("data"), dict) else {}
+        task = self.current_task
+        if event_type in ("BLOCK_COMMITTED", "TASK_INVALIDATED"):
+            if task and data.get("block_id") == task["block_id"]:
+                print(f"[INFO] Блок #{task['block_id']} больше не нужен ({event_type}), задача отменена")
+                self.current_task = None
+                self.engine.cancel()
+            self.queue_changed.set()
+        elif event_type == "QUEUE_CHANGED":
+            self.queue_changed.set()
+
     def _check_task_status(self):
         """Проверка, актуальна ли текущая задача"""
         if not self.current_task:
@@ -118,35 +212,71 @@ class MinerClient:
             print("No tasks are currently pending\n")
 
 
-    def _calculate_hash(self, nonce: int) -> str:
-        task_data = self.current_task
-        data_string = (
-                task_data["info"] +
-                str(nonce) +
-                str(task_data["difficulty"])
-        )
-        return hashlib.sha256(data_string.encode('utf-8')).hexdigest()
+    def _should_stop(self) -> bool:
+        """Вызывается движком во время поиска: остановка или неактуальная задача"""
+        self._sample_hash_rate()
+        if not self.mining:
+            return True
+        if not self.subscribed and int(current_time()) - self.last_check > self.check_interval:
+            self._check_task_status()
+            self.last_check = int(current_time())
+        return self.current_task is None
 
     def _process_task(self):
-        start = self.current_task["nonce_start"]
-        end = self.current_task["nonce_end"]
-        target_zeros = self.current_task["difficulty"]  # Number of leading zeros required
-
-        print(f"[MINING] Processing range {start}-{end}")
+        task = self.current_task
+        start = task["nonce_start"]
+        end = task["nonce_end"]
+        target_zeros = task["difficulty"]  # Number of leading zeros required
+
+        print(f"[MINING] Processing range {start}-{end} on {self.engine.workers} workers")
+
+        self._sample_hashes = self.engine.hashes_done()
+        self._sample_time = current_time()
+        solution = self.engine.search(
+            task["info"], target_zeros, start, end,
+            should_stop=self._should_stop
+        )
+        self._sample_hash_rate()
+
+        if solution:
+            nonce, current_hash = solution
+            print(f"[SOLUTION] Valid nonce found: {nonce}")
+            self._submit_solution(nonce, current_hash)
+        elif self.mining and self.current_task is task:
+            print("[WARNING] No valid nonce found in range")
+            self._complete_range(start, end)
+            return
 
-        for nonce in range(start, end + 1):
-            if not self.mining:
-                break
+        self.current_task = None  # Reset task to become idle
 
-            current_hash = self._calculate_hash(nonce)
-            if current_hash.startswith('0' * target_zeros):
-                print(f"[SOLUTION] Valid nonce found: {nonce}")
-                self._submit_solution(nonce, current_hash)
-                self.current_task = None
-                return
+    def _complete_range(self, start: int, end: int):
+        """Сообщает о просмотренном диапазоне и сразу берет следующий"""
+        response = self.send_command(f"RANGE_DONE {start} {end}")
+        if response.get("status") == "OK" and isinstance(response.get("data"), dict):
+            self.current_task = response["data"]
+            print(f"[TASK] Новый диапазон: {self.current_task['nonce_start']}-{self.current_task['nonce_end']}")
+        else:
+            self.current_task = None
 
-        print("[WARNING] No valid nonce found in range")
-        self.current_task = None  # Reset task to become idle
+    def _sample_hash_rate(self):
+        """Учет хэшей с прошлого замера по живому счетчику движка и отправка
+        REPORT_HASHRATE раз в report_interval, в том числе посреди поиска"""
+        now = current_time()
+        hashes = self.engine.hashes_done()
+        self._report_hashes += hashes - self._sample_hashes
+        self._report_seconds += now - self._sample_time
+        self._sample_hashes = hashes
+        self._sample_time = now
+        if self._report_seconds > 0:
+            self.hash_rate = self._report_hashes / self._report_seconds
+
+        if current_time() - self.last_report >= self.report_interval and self._report_seconds > 0:
+            response = self.send_command(f"REPORT_HASHRATE {self.hash_rate:.0f}")
+            if response.get("status") == "OK":
+                print(f"[STATS] Скорость: {self.hash_rate:.0f} H/s")
+            self.last_report = current_time()
+            self._report_hashes = 0
+            self._report_seconds = 0.0
 
     def _submit_solution(self, nonce: int, solution_hash: str):
         response = self.send_command(f"SUBMIT_SOLUTION {nonce} {solution_hash}")
@@ -157,11 +287,70 @@ class MinerClient:
             print(f"[ERROR] {response.get('message', 'Unknown error')}")
 
 
+def run_benchmark(difficulty: int = 8, duration: float = 10.0, workers: int = None) -> dict:
+    """Майнинг синтетического info заданной сложности в течение duration секунд"""
+    engine = MiningEngine(workers)
+    info = "0" * 64 + str(current_time()) + "benchmark" * 200
+    chunk = engine.workers * 1000000
+    hashes = 0
+    seconds = 0.0
+    # pid воркера -> [хэши, секунды работы]
+    per_worker = {}
+    solutions = 0
+    nonce = 0
+    deadline = current_time() + duration
+
+    try:
+        while current_time() < deadline:
+            if engine.search(info, difficulty, nonce, nonce + chunk - 1,
+                             should_stop=lambda: current_time() >= deadline):
+                solutions += 1
+            hashes += engine.last_hashes
+            seconds += engine.last_elapsed
+            for pid, (worker_hashes, worker_seconds) in engine.last_worker_stats.items():
+                stats = per_worker.setdefault(pid, [0, 0.0])
+                stats[0] += worker_hashes
+                stats[1] += worker_seconds
+            nonce += chunk
+    finally:
+        engine.close()
+
+    total_rate = hashes / seconds if seconds else 0.0
+    worker_rates = [h / t for h, t in per_worker.values() if t > 0]
+    return {
+        "workers": engine.workers,
+        "difficulty": difficulty,
+        "hashes": hashes,
+        "seconds": round(seconds, 3),
+        "solutions": solutions,
+        "total_hash_rate": round(total_rate),
+        "per_core_hash_rate": round(sum(worker_rates) / len(worker_rates)) if worker_rates else 0,
+        "worker_hash_rates": [round(rate) for rate in worker_rates]
+    }
+
+
 def main():
+    parser = argparse.ArgumentParser(description='Blockchain Miner')
+    parser.add_argument('--benchmark', action='store_true', help='Measure hash rate and exit')
+    parser.add_argument('--difficulty', type=int, default=8, help='Benchmark difficulty (leading zeros)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Benchmark duration, seconds')
+    parser.add_argument('--workers', type=int, default=None, help='Mining processes (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(f"\n=== Benchmark: difficulty {args.difficulty}, {args.duration} s ===")
+        result = run_benchmark(args.difficulty, args.duration, args.workers)
+        print(f"Процессов: {result['workers']}")
+        print(f"Хэшей: {result['hashes']} за {result['seconds']} с")
+        print(f"Скорость на ядро: {result['per_core_hash_rate']} H/s")
+        print(f"По процессам: {', '.join(str(rate) for rate in result['worker_hash_rates'])} H/s")
+        print(f"Общая скорость: {result['total_hash_rate']} H/s")
+        return
+
     print("\n=== Blockchain Miner ===")
     host = input("Адрес сервера [localhost]: ") or "localhost"
     port = int(input("Порт сервера [65432]: ") or 65432)
-    client = MinerClient(host, port)
+    client = MinerClient(host, port, args.workers)
 
     # Аутентификация
     print("\n=== Аутентификация ===")
@@ -187,7 +376,9 @@ def main():
     try:
         while True: sleep(1)
     except KeyboardInterrupt:
-        client.mining = False
+        client.stop_mining()
+        if client.engine:
+            client.engine.close()
         print("\nМайнинг остановлен")
 
 
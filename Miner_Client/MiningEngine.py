@@ -0,0 +1,157 @@
+import hashlib
+import multiprocessing
+import os
+from time import time as current_time
+from typing import Callable, Dict, List, Optional, Tuple
+
+_stop_event = None
+_hash_counter = None
+
+
+def _init_worker(stop_event, hash_counter) -> None:
+    global _stop_event, _hash_counter
+    _stop_event = stop_event
+    _hash_counter = hash_counter
+
+
+def _count_hashes(count: int) -> None:
+    """Добавляет хэши в общий счетчик, видимый родительскому процессу во время поиска"""
+    if _hash_counter is not None:
+        with _hash_counter.get_lock():
+            _hash_counter.value += count
+
+
+def _meets_difficulty(digest: bytes, difficulty: int) -> bool:
+    """Проверка ведущих нулей hex-представления по сырому дайджесту"""
+    full_bytes, half = divmod(difficulty, 2)
+    if digest[:full_bytes] != bytes(full_bytes):
+        return False
+    return not half or digest[full_bytes] < 0x10
+
+
+def search_range(
+        info: str,
+        difficulty: int,
+        start: int,
+        end: int,
+        batch_size: int = 4096
+) -> Tuple[Optional[Tuple[int, str]], int, float, int]:
+    """
+    Перебор nonce в [start, end] от SHA-256 midstate строки info.
+    Флаг остановки проверяется и общий счетчик хэшей пополняется один раз
+    на пакет из batch_size nonce. Возвращает (решение или None, число
+    посчитанных хэшей, время работы воркера, pid воркера).
+    """
+    started = current_time()
+    prefix = hashlib.sha256(info.encode('utf-8'))
+    suffix = str(difficulty).encode('utf-8')
+    hashes = 0
+
+    nonce = start
+    while nonce <= end:
+        if _stop_event is not None and _stop_event.is_set():
+            break
+        batch_end = min(nonce + batch_size, end + 1)
+        for candidate in range(nonce, batch_end):
+            hasher = prefix.copy()
+            hasher.update(str(candidate).encode('utf-8') + suffix)
+            if _meets_difficulty(hasher.digest(), difficulty):
+                if _stop_event is not None:
+                    _stop_event.set()
+                _count_hashes(candidate - nonce + 1)
+                hashes += candidate - nonce + 1
+                return (candidate, hasher.hexdigest()), hashes, current_time() - started, os.getpid()
+        _count_hashes(batch_end - nonce)
+        hashes += batch_end - nonce
+        nonce = batch_end
+
+    return None, hashes, current_time() - started, os.getpid()
+
+
+class MiningEngine:
+    """
+    Многоядерный майнинг: диапазон nonce делится между процессами пула,
+    общий stop event отменяет всех воркеров при найденном решении
+    или по cancel().
+    """
+
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 4096):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.stop_event = multiprocessing.Event()
+        self.hash_counter = multiprocessing.Value('q', 0)
+        self.pool = multiprocessing.Pool(
+            processes=self.workers,
+            initializer=_init_worker,
+            initargs=(self.stop_event, self.hash_counter)
+        )
+        self.last_hashes = 0
+        self.last_elapsed = 0.0
+        # pid воркера -> (хэши, секунды) за последний search()
+        self.last_worker_stats: Dict[int, Tuple[int, float]] = {}
+
+    def split_range(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Делит [start, end] на непрерывные поддиапазоны по числу воркеров"""
+        total = end - start + 1
+        if total <= 0:
+            return []
+        chunk = -(-total // self.workers)
+        return [(s, min(s + chunk - 1, end)) for s in range(start, end + 1, chunk)]
+
+    def search(
+            self,
+            info: str,
+            difficulty: int,
+            start: int,
+            end: int,
+            should_stop: Optional[Callable[[], bool]] = None,
+            poll_interval: float = 0.1
+    ) -> Optional[Tuple[int, str]]:
+        """
+        Ищет nonce в [start, end]. Блокирует до решения, исчерпания
+        диапазона или отмены (cancel() либо should_stop() == True).
+        """
+        self.stop_event.clear()
+        started = current_time()
+        pending = [
+            self.pool.apply_async(search_range, (info, difficulty, s, e, self.batch_size))
+            for s, e in self.split_range(start, end)
+        ]
+
+        solution = None
+        hashes = 0
+        worker_stats: Dict[int, Tuple[int, float]] = {}
+        while pending:
+            pending[0].wait(poll_interval)
+            still_pending = []
+            for result in pending:
+                if result.ready():
+                    found, count, seconds, pid = result.get()
+                    hashes += count
+                    worker_hashes, worker_seconds = worker_stats.get(pid, (0, 0.0))
+                    worker_stats[pid] = (worker_hashes + count, worker_seconds + seconds)
+                    if found and solution is None:
+                        solution = found
+                else:
+                    still_pending.append(result)
+            pending = still_pending
+            if pending and should_stop and not self.stop_event.is_set() and should_stop():
+                self.cancel()
+
+        self.last_hashes = hashes
+        self.last_elapsed = current_time() - started
+        self.last_worker_stats = worker_stats
+        return solution
+
+    def hashes_done(self) -> int:
+        """Всего хэшей с создания движка; растет и во время search()"""
+        return self.hash_counter.value
+
+    def cancel(self) -> None:
+        """Останавливает всех воркеров текущего поиска"""
+        self.stop_event.set()
+
+    def close(self) -> None:
+        self.cancel()
+        self.pool.terminate()
+        self.pool.join()
@@ -1,4 +1,5 @@
 from .server import BlockchainServer
 from .request_router import RequestRouter
+from .lease_reaper import LeaseReaper
 
-__all__ = ['BlockchainServer', 'RequestRouter']
\ No newline at end of file
+__all__ = ['BlockchainServer', 'RequestRouter', 'LeaseReaper']
\ No newline at end of file
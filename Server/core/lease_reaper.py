@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Dict, List
+from ..models import MiningTask
+
+
+class LeaseReaper(threading.Thread):
+    """
+    Фоновый поток: раз в interval секунд обходит очередь задач и
+    возвращает в свободный список диапазоны nonce, аренда которых
+    длится дольше lease_timeout.
+
+    Общий lock берется только на копирование среза очереди из
+    slice_size задач; сама очистка идет под блокировкой задачи.
+    """
+
+    def __init__(
+            self,
+            task_queue: List[MiningTask],
+            lock: threading.Lock,
+            lease_timeout: float = 120.0,
+            interval: float = 5.0,
+            slice_size: int = 32
+    ):
+        super().__init__(name="lease-reaper", daemon=True)
+        self.task_queue = task_queue
+        self.lock = lock
+        self.lease_timeout = lease_timeout
+        self.interval = interval
+        self.slice_size = slice_size
+        self.stop_event = threading.Event()
+
+        self.sweeps = 0
+        self.reclaimed_leases = 0
+        self.reclaimed_nonces = 0
+        self.last_sweep_seconds = 0.0
+        self.max_lock_hold_seconds = 0.0
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Lease reaper error: {str(e)}")
+
+    def sweep(self) -> int:
+        """Один проход по очереди. Возвращает число возвращенных аренд"""
+        started = time.perf_counter()
+        reclaimed = 0
+        offset = 0
+        while True:
+            with self.lock:
+                acquired = time.perf_counter()
+                batch = self.task_queue[offset:offset + self.slice_size]
+            self.max_lock_hold_seconds = max(
+                self.max_lock_hold_seconds, time.perf_counter() - acquired
+            )
+            if not batch:
+                break
+
+            for task in batch:
+                for start, end in task.reset_expired_ranges(self.lease_timeout):
+                    reclaimed += 1
+                    self.reclaimed_nonces += end - start + 1
+            offset += len(batch)
+
+        self.sweeps += 1
+        self.reclaimed_leases += reclaimed
+        self.last_sweep_seconds = time.perf_counter() - started
+        return reclaimed
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "sweeps": self.sweeps,
+            "reclaimed_leases": self.reclaimed_leases,
+            "reclaimed_nonces": self.reclaimed_nonces,
+            "last_sweep_seconds": self.last_sweep_seconds,
+            "max_lock_hold_seconds": self.max_lock_hold_seconds
+        }
@@ -5,10 +5,11 @@ from ..handlers import (
     admin_handler,
     miner_handler,
     view_handler,
-    RewardHandler
+    RewardHandler,
+    SessionManager
 )
-from ..utils import response_formatter
-from ..models import User, MiningTask, Blockchain
+from ..utils import response_formatter, LRUCache, EventBus
+from ..models import User, MiningTask, Blockchain, MinerStats
 
 class RequestRouter:
     def __init__(
@@ -16,7 +17,10 @@ class RequestRouter:
             blockchain: Blockchain,
             task_queue: List[MiningTask],
             rewards: RewardHandler,
-            lock: threading.Lock
+            lock: threading.Lock,
+            view_cache_bytes: int = 16 * 1024 * 1024,
+            session_ttl: int = 900,
+            target_lease_seconds: float = 30.0
     ):
         self.blockchain = blockchain
         self.task_queue = task_queue
@@ -24,13 +28,49 @@ class RequestRouter:
         self.lock = lock
         self.miner_counter = 0
         self.miner_lock = threading.Lock()
+        self.sessions = SessionManager(session_ttl)
+        self.miner_stats = MinerStats()
+        # Целевая длительность аренды диапазона nonce при адаптивной выдаче
+        self.target_lease_seconds = target_lease_seconds
+        # Фоновый LeaseReaper, назначается сервером
+        self.reaper = None
 
-    def _parse_request(self, raw_data: str) -> Tuple[List[str], Optional[User]]:
-        """Парсинг сырых данных запроса"""
+        # Кэш готовых ответов VIEW_BLOCK, ограничен по объему в байтах
+        self.view_cache = LRUCache(
+            max_items=None,
+            max_size=view_cache_bytes,
+            sizeof=len
+        )
+        self.blockchain.add_commit_listener(
+            lambda block: view_handler.cache_block_response(self.view_cache, block)
+        )
+
+        # События для подписчиков SUBSCRIBE
+        self.events = EventBus()
+        self.blockchain.add_commit_listener(
+            lambda block: self.events.publish("BLOCK_COMMITTED", {
+                "block_id": block.id,
+                "hash": block.hash
+            })
+        )
+
+    def _parse_request(self, raw_data: str) -> Tuple[List[str], Optional[User], Optional[str]]:
+        """Парсинг сырых данных запроса.
+        Возвращает команды, пользователя и токен сессии (если был AUTH)"""
         try:
             lines = [line.strip() for line in raw_data.split('\r\n') if line.strip()]
             if not lines:
-                return [], None
+                return [], None, None
+
+            # Авторизация по токену сессии без bcrypt
+            auth_index = next(
+                (i for i, line in enumerate(lines) if line.startswith("AUTH ")),
+                None
+            )
+
+            if auth_index is not None:
+                _, token = lines[auth_index].split()
+                return lines[auth_index + 1:], self.sessions.get(token), token
 
             # Выделение команды LOGIN если есть
             login_index = next(
@@ -42,25 +82,39 @@ class RequestRouter:
                 # Аутентификация пользователя
                 _, username, password = lines[login_index].split()
                 user = auth_handler.authenticate(username, password)
-                return lines[login_index + 1:], user
+                return lines[login_index + 1:], user, None
 
-            return lines, None
+            return lines, None, None
 
         except Exception as e:
-            return [], None
+            return [], None, None
 
     def _handle_unauthorized(self, command: str) -> str:
         """Обработка команд для неавторизованных пользователей"""
         if command == "HELP":
             return response_formatter.format_help(authenticated=False)
 
-        if command.startswith("VIEW_BLOCK"):
+        name = command.split(' ', 1)[0]
+        if name == "VIEW_BLOCKS":
+            # Без потоковой отдачи сервера - ответ целиком
+            return b"".join(view_handler.stream_view_blocks(self.blockchain, command)).decode('utf-8')
+
+        if name == "VIEW_BLOCK":
             try:
                 _, block_id = command.split()
                 return view_handler.handle_view_block(self.blockchain, block_id)
             except:
                 return response_formatter.format_error("Invalid block ID")
 
+        if command.startswith("FIND_DIPLOMA"):
+            return view_handler.handle_find_diploma(self.blockchain, command)
+
+        if command.startswith("EXISTS"):
+            return view_handler.handle_exists(self.blockchain, command)
+
+        if command.startswith("PROVE"):
+            return view_handler.handle_prove(self.blockchain, command)
+
         return response_formatter.format_error("Authentication required")
 
     def _handle_authorized(self, commands: List[str], user: User) -> str:
@@ -92,12 +146,23 @@ class RequestRouter:
 
     def _handle_admin_command(self, command: str, username: str) -> str:
         """Обработка команд администратора"""
+        if command.startswith("ADD_BLOCKS"):
+            return admin_handler.handle_add_blocks(
+                command=command,
+                queue=self.task_queue,
+                lock=self.lock,
+                blockchain=self.blockchain,
+                events=self.events,
+                workers=self.blockchain.workers
+            )
+
         if command.startswith("ADD_BLOCK"):
             return admin_handler.handle_add_block(
                 command=command,
                 queue=self.task_queue,
                 lock=self.lock,
-                blockchain=self.blockchain
+                blockchain=self.blockchain,
+                events=self.events
             )
 
         if command == "LIST_QUEUE":
@@ -106,6 +171,16 @@ class RequestRouter:
                     f"Pending tasks: {len(self.task_queue)}"
                 )
 
+        if command == "RELOAD_USERS":
+            try:
+                count = auth_handler.user_store.reload()
+            except ValueError as e:
+                return response_formatter.format_error(str(e))
+            return response_formatter.format_success(f"Users reloaded: {count}")
+
+        if command == "STATS":
+            return response_formatter.format_response("STATS", self.get_stats())
+
         return response_formatter.format_error("Unknown admin command")
 
     def _handle_miner_command(self, command: str, username: str) -> str:
@@ -114,7 +189,9 @@ class RequestRouter:
             return miner_handler.handle_mine_command(
                 username,
                 self.task_queue,
-                self.lock
+                self.lock,
+                miner_stats=self.miner_stats,
+                target_lease_seconds=self.target_lease_seconds
             )
 
         if command.startswith("SUBMIT_SOLUTION"):
@@ -124,21 +201,79 @@ class RequestRouter:
                 self.blockchain,
                 self.task_queue,
                 self.rewards,
-                self.lock
+                self.lock,
+                events=self.events
+            )
+
+        if command.startswith("RANGE_DONE"):
+            return miner_handler.handle_range_done(
+                command,
+                username,
+                self.task_queue,
+                self.lock,
+                miner_stats=self.miner_stats,
+                target_lease_seconds=self.target_lease_seconds
             )
 
+        if command.startswith("REPORT_HASHRATE"):
+            return miner_handler.handle_report_hashrate(command, username, self.miner_stats)
+
         return response_formatter.format_error("Unknown miner command")
 
+    def get_stats(self) -> dict:
+        """Статистика сервера для команды STATS"""
+        return {
+            "blocks": len(self.blockchain),
+            "view_cache": self.view_cache.stats(),
+            "block_cache": self.blockchain.cache_stats(),
+            "hash_rate": {
+                "total": self.miner_stats.total(),
+                "miners": self.miner_stats.snapshot()
+            },
+            "lease_reaper": self.reaper.stats() if self.reaper else None,
+            "subscribers": len(self.events),
+            "persistence": self.blockchain.persistence_stats(),
+            "reg_number_filter": self.blockchain.bloom_stats(),
+            "merkle": {
+                "tree_size": len(self.blockchain.merkle),
+                "root": self.blockchain.merkle.root()
+            }
+        }
+
+    def route_request_bytes(self, raw_data: str) -> bytes:
+        """Маршрутизация с ответом, готовым к отправке.
+        Одиночный VIEW_BLOCK отдается из кэша закодированных ответов."""
+        command = raw_data.strip()
+        if command.startswith("VIEW_BLOCK ") and '\n' not in command:
+            parts = command.split()
+            if len(parts) == 2 and parts[0] == "VIEW_BLOCK":
+                return view_handler.handle_view_block_cached(
+                    self.blockchain, parts[1], self.view_cache
+                )
+        return self.route_request(raw_data).encode('utf-8')
+
     def route_request(self, raw_data: str) -> str:
         """Основной метод маршрутизации запросов"""
         try:
-            commands, user = self._parse_request(raw_data)
+            commands, user, token = self._parse_request(raw_data)
+
+            if token is not None:
+                if user is None:
+                    return response_formatter.format_error("Invalid or expired session", 403)
+                if commands == ["LOGOUT"]:
+                    self.sessions.revoke(token)
+                    return response_formatter.format_success("Logged out")
 
             if not commands:
                 if not user:
                     return response_formatter.format_error("Invalid username or password")
                 if user:
-                    return response_formatter.format_success("PASS", 201)
+                    # Токен для последующих запросов с префиксом AUTH <token>
+                    token = token or self.sessions.create(user)
+                    return response_formatter.format_response("201 PASS", {
+                        "token": token,
+                        "expires_in": self.sessions.expires_in(token)
+                    })
 
             # Обработка неавторизованных команд
             if user is None:
@@ -1,17 +1,57 @@
+import asyncio
+import queue
+import select
 import socket
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from .request_router import RequestRouter
+from .lease_reaper import LeaseReaper
 from ..models import Blockchain
-from ..handlers import RewardHandler
+from ..handlers import RewardHandler, view_handler
+from ..utils import response_formatter
 
 class BlockchainServer:
-    def __init__(self, host='127.0.0.1', port=65432):
+    # Сколько непрочитанных событий допускается на одного подписчика
+    SUBSCRIBER_QUEUE_SIZE = 1024
+    # Верхняя граница буфера записи при потоковой отдаче VIEW_BLOCKS
+    STREAM_BUFFER_LIMIT = 256 * 1024
+
+    def __init__(
+            self,
+            host='127.0.0.1',
+            port=65432,
+            lazy_chain: bool = False,
+            mode: str = "async",
+            executor_workers: Optional[int] = None,
+            lease_timeout: float = 120.0,
+            reaper_interval: float = 5.0,
+            durability: str = "block",
+            sync_interval_ms: float = 50.0
+    ):
+        """
+        :param mode: "async" - asyncio-сервер с пулом потоков для тяжелых
+            запросов (bcrypt, RSA, запись на диск); "thread" - поток на соединение
+        :param executor_workers: размер пула потоков в режиме "async"
+        :param lease_timeout: через сколько секунд аренда диапазона nonce истекает
+        :param reaper_interval: период фоновой очистки истекших аренд
+        :param durability: политика fsync при записи блоков: "block" - на каждую
+            пачку, "interval" - раз в sync_interval_ms, "os" - без fsync
+        """
+        if mode not in ("async", "thread"):
+            raise ValueError(f"Unknown server mode: {mode}")
+
         self.host = host
         self.port = port
+        self.mode = mode
         self.socket = None
         self.lock = threading.Lock()
-        self.rewards = RewardHandler()
-        self.blockchain = Blockchain()
+        self.rewards = RewardHandler(fsync=durability == "block")
+        self.blockchain = Blockchain(
+            lazy=lazy_chain,
+            durability=durability,
+            sync_interval_ms=sync_interval_ms
+        )
         self.task_queue = []
         self.router = RequestRouter(
             blockchain=self.blockchain,
@@ -19,28 +59,234 @@ class BlockchainServer:
             rewards=self.rewards,
             lock=self.lock
         )
+        self.executor = ThreadPoolExecutor(
+            max_workers=executor_workers,
+            thread_name_prefix="request"
+        )
+        self.async_server: Optional[asyncio.AbstractServer] = None
+        self.reaper = LeaseReaper(
+            self.task_queue,
+            self.lock,
+            lease_timeout=lease_timeout,
+            interval=reaper_interval
+        )
+        self.router.reaper = self.reaper
+
+    @staticmethod
+    def _split_requests(buffer: bytearray, received: int) -> list:
+        """
+        Извлекает из буфера завершенные запросы. Разделитель ищется только
+        в последних received байтах (и 3 байтах перед ними), чтобы большие
+        запросы вроде ADD_BLOCKS не сканировались заново на каждом чтении.
+        """
+        requests = []
+        search_from = max(0, len(buffer) - received - 3)
+        while True:
+            end = buffer.find(b"\r\n\r\n", search_from)
+            if end < 0:
+                return requests
+            requests.append(bytes(buffer[:end]).decode('utf-8'))
+            del buffer[:end + 4]
+            search_from = 0
 
     def handle_client(self, client_socket):
         try:
-            buffer = ""
+            buffer = bytearray()
             while True:
-                data = client_socket.recv(4096).decode('utf-8')
+                data = client_socket.recv(65536)
                 if not data:
                     break
 
                 buffer += data
-                print(buffer)
-                while "\r\n\r\n" in buffer:
-                    request, sep, buffer = buffer.partition("\r\n\r\n")
-                    response = self.router.route_request(request)
-                    client_socket.sendall(response.encode('utf-8'))
-        except ConnectionResetError as e:
+                print(data[:4096].decode('utf-8', errors='replace'))
+                for request in self._split_requests(buffer, len(data)):
+                    if self._is_subscribe(request):
+                        self._stream_events(client_socket, request)
+                        return
+                    if self._is_view_blocks(request):
+                        self._stream_view_blocks(client_socket, request)
+                        continue
+                    response = self.router.route_request_bytes(request)
+                    client_socket.sendall(response)
+        except (OSError, UnicodeDecodeError) as e:
             print(f"Client crashed, error({e})")
         finally:
             client_socket.close()
 
+    @staticmethod
+    def _is_subscribe(request: str) -> bool:
+        """SUBSCRIBE переводит соединение в режим потока событий"""
+        return request.strip().split(' ', 1)[0] == "SUBSCRIBE"
+
+    def _subscribe(self, request: str, deliver) -> tuple:
+        """
+        Регистрирует подписчика. Возвращает (id подписки, ответ клиенту);
+        при ошибке id равен None.
+        """
+        event_types = request.strip().split()[1:]
+        try:
+            subscription_id = self.router.events.subscribe(deliver, event_types)
+        except ValueError as e:
+            return None, response_formatter.format_error(str(e))
+        return subscription_id, response_formatter.format_response(
+            "200 SUBSCRIBED", {"events": event_types or "ALL"}
+        )
+
+    def _stream_events(self, client_socket, request: str):
+        """Поток событий для соединения в режиме "thread" """
+        events = queue.Queue(maxsize=self.SUBSCRIBER_QUEUE_SIZE)
+        overflow = threading.Event()
+
+        def deliver(message: bytes):
+            try:
+                events.put_nowait(message)
+            except queue.Full:
+                overflow.set()
+
+        subscription_id, response = self._subscribe(request, deliver)
+        client_socket.sendall(response.encode('utf-8'))
+        if subscription_id is None:
+            return
+
+        try:
+            while not overflow.is_set():
+                try:
+                    client_socket.sendall(events.get(timeout=1.0))
+                except queue.Empty:
+                    # Клиент ничего не отправляет, поэтому readable означает закрытие
+                    readable, _, _ = select.select([client_socket], [], [], 0)
+                    if readable and not client_socket.recv(4096):
+                        break
+        except OSError:
+            pass
+        finally:
+            self.router.events.unsubscribe(subscription_id)
+
+    @staticmethod
+    def _enqueue_event(events: asyncio.Queue, message: bytes):
+        if events.full():
+            # Медленный подписчик: закрываем поток, клиент переподпишется
+            while not events.empty():
+                events.get_nowait()
+            events.put_nowait(None)
+            return
+        events.put_nowait(message)
+
+    async def _stream_events_async(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+            request: str
+    ):
+        """Поток событий для соединения в режиме "async" """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue(maxsize=self.SUBSCRIBER_QUEUE_SIZE)
+
+        def deliver(message: bytes):
+            loop.call_soon_threadsafe(self._enqueue_event, events, message)
+
+        subscription_id, response = self._subscribe(request, deliver)
+        writer.write(response.encode('utf-8'))
+        await writer.drain()
+        if subscription_id is None:
+            return
+
+        closed = asyncio.ensure_future(reader.read())
+        try:
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait(
+                    {getter, closed}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter not in done:
+                    getter.cancel()
+                    break
+                message = getter.result()
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self.router.events.unsubscribe(subscription_id)
+            closed.cancel()
+
+    @staticmethod
+    def _is_view_blocks(request: str) -> bool:
+        """VIEW_BLOCKS отдается потоком частями, а не одним ответом"""
+        command = request.strip()
+        return command.startswith("VIEW_BLOCKS ") and '\n' not in command
+
+    def _stream_view_blocks(self, client_socket, request: str):
+        # sendall блокирует поток, пока клиент не примет данные
+        for chunk in view_handler.stream_view_blocks(self.blockchain, request.strip()):
+            client_socket.sendall(chunk)
+
+    async def _stream_view_blocks_async(self, writer: asyncio.StreamWriter, request: str):
+        """Части готовятся в пуле потоков; drain() приостанавливает отдачу,
+        пока буфер транспорта выше верхней границы"""
+        loop = asyncio.get_running_loop()
+        chunks = view_handler.stream_view_blocks(self.blockchain, request.strip())
+        writer.transport.set_write_buffer_limits(high=self.STREAM_BUFFER_LIMIT)
+        while True:
+            chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            if chunk is None:
+                break
+            writer.write(chunk)
+            await writer.drain()
+
+    @staticmethod
+    def _is_lightweight(request: str) -> bool:
+        """Запросы, которые можно обработать прямо в цикле событий"""
+        command = request.strip()
+        return command.startswith("VIEW_BLOCK ") and '\n' not in command
+
+    async def handle_client_async(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        print(f"New connection from {writer.get_extra_info('peername')}")
+        try:
+            buffer = bytearray()
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+
+                buffer += data
+                for request in self._split_requests(buffer, len(data)):
+                    if self._is_subscribe(request):
+                        await self._stream_events_async(reader, writer, request)
+                        return
+                    if self._is_view_blocks(request):
+                        await self._stream_view_blocks_async(writer, request)
+                        continue
+                    if self._is_lightweight(request):
+                        response = self.router.route_request_bytes(request)
+                    else:
+                        response = await loop.run_in_executor(
+                            self.executor, self.router.route_request_bytes, request
+                        )
+                    writer.write(response)
+                    await writer.drain()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Client crashed, error({e})")
+        finally:
+            writer.close()
+
+    async def serve_async(self):
+        self.async_server = await asyncio.start_server(
+            self.handle_client_async, self.host, self.port
+        )
+        print(f"Server running on {self.host}:{self.port} (asyncio)")
+        async with self.async_server:
+            await self.async_server.serve_forever()
 
     def run(self):
+        if not self.reaper.is_alive():
+            self.reaper.start()
+
+        if self.mode == "async":
+            asyncio.run(self.serve_async())
+            return
+
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.bind((self.host, self.port))
         self.socket.listen()
@@ -56,5 +302,12 @@ class BlockchainServer:
             client_handler.start()
 
     def shutdown(self):
-        self.socket.close()
-        print("Server shutdown complete")
\ No newline at end of file
+        self.reaper.stop()
+        if self.socket:
+            self.socket.close()
+        if self.async_server:
+            self.async_server.close()
+        self.executor.shutdown(wait=False)
+        self.blockchain.close()
+        self.rewards.close()
+        print("Server shutdown complete")
@@ -1,7 +1,7 @@
 from ..core import BlockchainServer
 
-def start_server():
-    server = BlockchainServer()
+def start_server(mode: str = "async"):
+    server = BlockchainServer(mode=mode)
     try:
         server.run()
     except KeyboardInterrupt:
@@ -2,8 +2,10 @@
 from .auth_handler import authenticate
 from .admin_handler import handle_add_block
 from .miner_handler import handle_mine_command
-from .view_handler import handle_view_block
+from .view_handler import handle_view_block, handle_find_diploma
 from .reward_handler import RewardHandler
+from .session_handler import SessionManager
 
 __all__ = ['authenticate', 'handle_add_block', 'handle_mine_command',
- 'handle_view_block', 'RewardHandler']
\ No newline at end of file
+ 'handle_view_block', 'handle_find_diploma', 'RewardHandler',
+ 'SessionManager']
\ No newline at end of file
@@ -1,14 +1,25 @@
 import json
+from time import time
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from threading import Lock
-from typing import List
-from ..utils import response_formatter
+from typing import Dict, List, Optional
+from ..utils import response_formatter, EventBus
 from ..models import MiningTask
-from ..models import Block
+from ..models import Block, ChainValidator
 
+# Пакеты от этого размера проверяются в пуле процессов
+ADD_BLOCKS_PARALLEL_THRESHOLD = 512
+ADD_BLOCKS_MAX_ITEMS = 10000
 
-def handle_add_block(command: str, queue: List[MiningTask], lock: Lock, blockchain) -> str:
+
+def handle_add_block(
+        command: str,
+        queue: List[MiningTask],
+        lock: Lock,
+        blockchain,
+        events: Optional[EventBus] = None
+) -> str:
     """Обработка добавления нового блока администратором"""
     try:
         # Парсинг команды
@@ -52,6 +63,8 @@ def handle_add_block(command: str, queue: List[MiningTask], lock: Lock, blockcha
         # Добавление в очередь майнинга
         with lock:
             queue.append(MiningTask(new_block, blockchain, "pending"))
+            if events:
+                events.publish("QUEUE_CHANGED", {"pending": len(queue)})
             return response_formatter.format_response(
                 "202 Block queued for mining",
                 data={
@@ -63,4 +76,137 @@ def handle_add_block(command: str, queue: List[MiningTask], lock: Lock, blockcha
             )
 
     except Exception as e:
-        return response_formatter.format_error(f"Error processing block: {str(e)}")
\ No newline at end of file
+        return response_formatter.format_error(f"Error processing block: {str(e)}")
+
+def _parse_batch(payload: str) -> tuple:
+    """
+    Разбор тела ADD_BLOCKS. Поддерживаются:
+        JSON-массив элементов ADD_BLOCK;
+        объект {"public_key": PEM, "diplomas": [...]} с общим ключом;
+        поток JSON-строк, разделенных переводом строки.
+    Возвращает (элементы, общий PEM или None).
+    """
+    payload = payload.strip()
+    if payload.startswith('['):
+        return json.loads(payload), None
+
+    lines = [line for line in payload.split('\n') if line.strip()]
+    if len(lines) == 1:
+        batch = json.loads(lines[0])
+        if isinstance(batch, dict) and 'diplomas' in batch:
+            return batch['diplomas'], batch.get('public_key')
+        return [batch], None
+    return [json.loads(line) for line in lines], None
+
+
+def handle_add_blocks(
+        command: str,
+        queue: List[MiningTask],
+        lock: Lock,
+        blockchain,
+        events: Optional[EventBus] = None,
+        workers: Optional[int] = None
+) -> str:
+    """Пакетное добавление блоков: ADD_BLOCKS <JSON-массив | поток JSON-строк>.
+    Ключ каждого издателя разбирается один раз, подписи проверяются
+    параллельно, все прошедшие проверку блоки ставятся в очередь за
+    одно взятие lock. Возвращает статус по каждому элементу."""
+    try:
+        _, payload = command.split(' ', 1)
+        items, shared_key_pem = _parse_batch(payload)
+    except (ValueError, KeyError, TypeError) as e:
+        return response_formatter.format_error(f"Invalid batch: {str(e)}")
+
+    if not isinstance(items, list) or not items:
+        return response_formatter.format_error("Batch must be a non-empty list")
+    if len(items) > ADD_BLOCKS_MAX_ITEMS:
+        return response_formatter.format_error(
+            f"Batch too large: {len(items)} > {ADD_BLOCKS_MAX_ITEMS}", 413
+        )
+
+    # Разбор ключей: по одному разу на издателя, PEM приводится к каноническому виду
+    canonical_pems: Dict[str, Optional[str]] = {}
+    statuses: List[dict] = []
+    candidates = []
+    for index, item in enumerate(items):
+        try:
+            diploma_data = {**item['diploma_data'], "signature": item['signature']}
+            pem = item.get('public_key') or shared_key_pem
+            if pem not in canonical_pems:
+                try:
+                    public_key = serialization.load_pem_public_key(
+                        pem.encode(),
+                        backend=default_backend()
+                    )
+                    canonical_pems[pem] = public_key.public_bytes(
+                        encoding=serialization.Encoding.PEM,
+                        format=serialization.PublicFormat.SubjectPublicKeyInfo
+                    ).decode('utf-8')
+                except (ValueError, TypeError, AttributeError):
+                    canonical_pems[pem] = None
+            if canonical_pems[pem] is None:
+                raise ValueError("Invalid public key")
+            statuses.append({"index": index, "status": "pending"})
+            candidates.append((index, diploma_data, canonical_pems[pem]))
+        except KeyError as e:
+            statuses.append({"index": index, "status": "error", "error": f"Missing field: {e.args[0]}"})
+        except (TypeError, ValueError) as e:
+            statuses.append({"index": index, "status": "error", "error": str(e)})
+
+    # Проверка подписей (в пуле процессов для больших пакетов)
+    validator = ChainValidator(
+        workers if len(candidates) >= ADD_BLOCKS_PARALLEL_THRESHOLD else 1
+    )
+    valid = validator.check_diplomas([(data, pem) for _, data, pem in candidates])
+
+    tasks = []
+    for (index, diploma_data, pem), signature_valid in zip(candidates, valid):
+        if not signature_valid:
+            statuses[index] = {"index": index, "status": "error", "error": "Invalid diploma signature"}
+            continue
+        block = Block.from_dict({
+            "id": 0,
+            "prev_hash": "0" * 64,
+            "timestamp": time(),
+            "diploma_data": diploma_data,
+            "public_key": pem,
+            "signature": diploma_data['signature'],
+            "nonce": 0,
+            "difficulty": blockchain.difficulty,
+            "hash": None
+        }, trusted=True)
+        block.verified = True
+        block.hash = block.calculate_hash()
+        tasks.append((index, MiningTask(block, blockchain, "pending")))
+
+    # Постановка в очередь за одно взятие lock
+    if tasks:
+        with lock:
+            if not queue:
+                # Первая задача привязывается к вершине цепочки
+                head = tasks[0][1].block
+                head.id = blockchain.current_id
+                head.prev_hash = blockchain.tip_hash()
+                head.hash = head.calculate_hash()
+            queue.extend(task for _, task in tasks)
+            pending = len(queue)
+
+        for index, task in tasks:
+            statuses[index] = {
+                "index": index,
+                "status": "queued",
+                "reg_number": task.block.diploma_data.get('reg_number'),
+                "initial_hash": task.block.hash
+            }
+        if events:
+            events.publish("QUEUE_CHANGED", {"pending": pending})
+
+    return response_formatter.format_response(
+        "202 Blocks queued for mining",
+        data={
+            "queued": len(tasks),
+            "rejected": len(statuses) - len(tasks),
+            "difficulty": blockchain.difficulty,
+            "items": statuses
+        }
+    )
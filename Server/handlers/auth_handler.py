@@ -1,28 +1,114 @@
 import bcrypt
 import json
 import os
-from typing import Dict, Optional
+import threading
+import time
+from dataclasses import asdict
+from typing import Dict, Optional, Tuple
 from ..models import User
 
 
-def load_users() -> Dict[str, User]:
-    """Загрузка пользователей из файла"""
-    users = []
+def load_users(file_path: str = 'users.json') -> Dict[str, User]:
+    """Загрузка пользователей из файла. Пустой словарь, если файла нет;
+    ValueError, если файл поврежден"""
+    if not os.path.exists(file_path):
+        return {}
     try:
-        if os.path.exists('users.json'):
-            with open('users.json', 'r') as f:
-                users_data = json.load(f)
-                users = [User(**data) for data in users_data]
-    except Exception as e:
-        print(f"Error loading users: {str(e)}")
+        with open(file_path, 'r') as f:
+            users_data = json.load(f)
+        users = [User(**data) for data in users_data]
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Corrupt users file {file_path}: {str(e)}") from e
     return {u.username: u for u in users}
 
 
+class UserStore:
+    """
+    Пользователи в памяти. Файл перечитывается только при изменении
+    его mtime/размера (проверка не чаще check_interval секунд)
+    или по явному reload(). Если файл не читается, в памяти остаются
+    прежние пользователи, а запись в файл блокируется до успешной загрузки.
+    """
+
+    def __init__(self, file_path: str = 'users.json', check_interval: float = 1.0):
+        self.file_path = file_path
+        self.check_interval = check_interval
+        self.users: Dict[str, User] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._last_check = 0.0
+        self.load_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.file_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def reload(self) -> int:
+        """Принудительно перечитывает файл. Возвращает число пользователей;
+        ValueError, если файл поврежден"""
+        with self._lock:
+            self._reload_locked()
+            return len(self.users)
+
+    def _reload_locked(self) -> None:
+        self._signature = self._file_signature()
+        self._last_check = time.monotonic()
+        try:
+            self.users = load_users(self.file_path)
+        except ValueError as e:
+            self.load_error = str(e)
+            raise
+        self.load_error = None
+
+    def _refresh_if_changed(self) -> None:
+        now = time.monotonic()
+        if self._signature is not None and now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            if self._file_signature() != self._signature:
+                try:
+                    self._reload_locked()
+                except ValueError as e:
+                    print(f"Error loading users: {str(e)}")
+
+    def get(self, username: str) -> Optional[User]:
+        self._refresh_if_changed()
+        return self.users.get(username)
+
+    def add_user(self, user: User) -> None:
+        """Атомарно добавляет пользователя в память и в файл"""
+        with self._lock:
+            if self._file_signature() != self._signature:
+                self._reload_locked()
+            if self.load_error:
+                raise ValueError(f"Users file not loaded, refusing to overwrite: {self.load_error}")
+            if user.username in self.users:
+                raise ValueError(f"Username '{user.username}' already exists")
+
+            users = {**self.users, user.username: user}
+            temp_path = self.file_path + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump([asdict(u) for u in users.values()], f, indent=4, sort_keys=True)
+            os.replace(temp_path, self.file_path)
+
+            self.users = users
+            self._signature = self._file_signature()
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+
+user_store = UserStore()
+
+
 def authenticate(username: str, password: str) -> Optional[User]:
     """Аутентификация пользователя"""
-    users = load_users()
-    user = users.get(username)
+    user = user_store.get(username)
 
     if user and bcrypt.checkpw(password.encode(), user.hashed_password.encode()):
         return user
-    return None
\ No newline at end of file
+    return None
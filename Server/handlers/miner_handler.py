@@ -1,16 +1,23 @@
 from threading import Lock
-from typing import List
-from ..models import MiningTask, Blockchain, Block
-from ..utils import response_formatter
+from typing import List, Optional
+from ..models import MiningTask, Blockchain, Block, MinerStats
+from ..utils import response_formatter, EventBus
 from datetime import datetime
 from .reward_handler import RewardHandler
 def handle_mine_command(
         miner_id: str,
         queue: List[MiningTask],
         lock: Lock,
-        nonce_range_size: int = 400000
+        nonce_range_size: int = 400000,
+        miner_stats: Optional[MinerStats] = None,
+        target_lease_seconds: float = 30.0
 ) -> str:
-    """Выдача задания майнеру"""
+    """Выдача задания майнеру.
+    Если известна скорость майнера, размер диапазона подбирается
+    под target_lease_seconds, иначе выдается nonce_range_size."""
+    hash_rate = miner_stats.get(miner_id) if miner_stats else None
+    previous_size = miner_stats.get_range_size(miner_id) if miner_stats else None
+
     with lock:
         if not queue:
             return response_formatter.format_error("No tasks available", 401)
@@ -19,19 +26,85 @@ def handle_mine_command(
         if not task:
             return response_formatter.format_error("No pending tasks", 401)
 
-        task.assign_to_miner(miner_id, nonce_range_size)
+        task.assign_to_miner(
+            miner_id,
+            previous_size or nonce_range_size,
+            hash_rate=hash_rate,
+            target_seconds=target_lease_seconds
+        )
+        start, end = task.get_miner_range(miner_id)
+        if miner_stats:
+            miner_stats.set_range_size(miner_id, end - start + 1)
         return response_formatter.task_data(task, miner_id)
 
 
+def handle_range_done(
+        command: str,
+        miner_id: str,
+        queue: List[MiningTask],
+        lock: Lock,
+        miner_stats: Optional[MinerStats] = None,
+        target_lease_seconds: float = 30.0
+) -> str:
+    """Диапазон просмотрен без решения: RANGE_DONE <start> <end>.
+    Диапазон помечается как просмотренный, майнеру сразу выдается новый."""
+    try:
+        _, start_str, end_str = command.split()
+        start, end = int(start_str), int(end_str)
+    except ValueError:
+        return response_formatter.format_error("Invalid format: RANGE_DONE <start> <end>")
+
+    with lock:
+        lease_seconds = None
+        for task in queue:
+            lease_seconds = task.complete_range(miner_id, start, end)
+            if lease_seconds is not None:
+                break
+
+    if lease_seconds is None:
+        return response_formatter.format_error("Range is not leased to this miner", 409)
+
+    # Наблюдаемая скорость по фактическому времени аренды
+    if miner_stats and lease_seconds > 0:
+        miner_stats.report(miner_id, (end - start + 1) / lease_seconds)
+
+    return handle_mine_command(
+        miner_id,
+        queue,
+        lock,
+        miner_stats=miner_stats,
+        target_lease_seconds=target_lease_seconds
+    )
+
+
+def handle_report_hashrate(command: str, miner_id: str, miner_stats: MinerStats) -> str:
+    """Прием измеренной скорости майнера: REPORT_HASHRATE <hashes_per_sec>"""
+    try:
+        _, rate_str = command.split()
+        smoothed = miner_stats.report(miner_id, float(rate_str))
+    except ValueError:
+        return response_formatter.format_error("Invalid format: REPORT_HASHRATE <hashes_per_sec>")
+
+    return response_formatter.format_response("HASHRATE", {
+        "hash_rate": smoothed,
+        "total_hash_rate": miner_stats.total()
+    })
+
+
 def handle_solution(
         command: str,
         miner_id: str,
         blockchain: Blockchain,
         task_queue: List[MiningTask],
         rewards : RewardHandler,
-        lock: Lock
+        lock: Lock,
+        events: Optional[EventBus] = None
 ) -> str:
-    """Обработка решения майнера с обновлением следующих задач в очереди"""
+    """Обработка решения майнера с обновлением следующих задач в очереди.
+
+    Под общим lock берется только снимок вершины и короткая фиксация
+    (compare-and-swap по задаче и хэшу вершины). Хэш проверяется без
+    блокировки, запись блока и наград на диск - после ее освобождения."""
     try:
         # Парсинг команды: SUBMIT_SOLUTION <nonce> <hash>
         _, nonce_str, submitted_hash = command.split()
@@ -39,50 +112,65 @@ def handle_solution(
     except ValueError:
         return response_formatter.format_error("Invalid format: SUBMIT_SOLUTION <nonce> <hash>")
 
+    # Снимок задачи на вершине очереди (FIFO)
     with lock:
         if not task_queue:
             return response_formatter.format_error("No active tasks")
-
-        # Берем первую задачу из очереди (FIFO)
         task = task_queue[0]
         block = task.block
-        block.nonce = nonce
-        start, stop = task.get_miner_range(miner_id)
-
-        # Проверка решения
-        calculated_hash = block.calculate_hash()
-        if not nonce in range(start, stop):
-            return response_formatter.format_error("Nonce is outside of range")
-        if calculated_hash != submitted_hash:
-            return response_formatter.format_error("Invalid hash")
+        prev_hash = block.prev_hash
+        # Копия midstate: дохэшировать nonce можно без блокировки
+        prefix = block.hash_prefix()
+        difficulty = block.difficulty
+        miner_range = task.get_miner_range(miner_id)
+        issued = task.is_issued_nonce(nonce)
 
-        if not calculated_hash.startswith('0' * block.difficulty):
-            return response_formatter.format_error("Difficulty not satisfied")
+    # Проверка решения без блокировки. Аренду могли отозвать (LeaseReaper)
+    # или выдать другую, пока майнер считал: верное решение из уже
+    # выданного диапазона все равно принимается, если вершина не сменилась
+    if not issued:
+        if miner_range is None:
+            return response_formatter.format_error("No range leased to this miner", 409)
+        return response_formatter.format_error("Nonce is outside of range")
+    calculated_hash = Block.finish_hash(prefix, nonce, difficulty)
+    if calculated_hash != submitted_hash:
+        return response_formatter.format_error("Invalid hash")
+    if not calculated_hash.startswith('0' * difficulty):
+        return response_formatter.format_error("Difficulty not satisfied")
 
+    with lock:
+        # Задачу уже решили или вершина сменилась после снимка
+        if (not task_queue or task_queue[0] is not task
+                or block.prev_hash != prev_hash or blockchain.tip_hash() != prev_hash):
+            return response_formatter.format_error("Task already solved", 409)
 
-        # Добавляем в блокчейн
-        blockchain.add_block(block)
-
-        # Обновляем последующие задачи в очереди
-        if len(task_queue) > 0:
-            # Удаляем завершенную задачу
-            task_queue.pop(0)
+        block.nonce = nonce
+        block.hash = calculated_hash
+        ticket = blockchain.commit_block(block)
 
-            # Обновляем
-            if len(task_queue) > 0:
-                task_queue[0].block.prev_hash = block.hash
-                task_queue[0].block.id = blockchain.current_id
+        # Удаляем завершенную задачу и перепривязываем следующую
+        task_queue.pop(0)
+        pending = len(task_queue)
+        if task_queue:
+            task_queue[0].block.prev_hash = block.hash
+            task_queue[0].block.id = blockchain.current_id
 
+        # Начисляем награду (в памяти)
+        reward = rewards.add_reward(miner_id, 1, save=False)
 
-            # Начисляем награду
-            rewards.add_reward(miner_id, 1)
+    # Запись на диск и уведомления - вне общей блокировки
+    blockchain.flush_pending(ticket)
+    rewards.save_rewards()
+    if events:
+        events.publish("TASK_INVALIDATED", {"block_id": block.id, "reason": "solved"})
+        events.publish("QUEUE_CHANGED", {"pending": pending})
 
-            return response_formatter.format_response(
-                "204 Block mined",
-                data={
-                    "block_id": block.id,
-                    "prev_hash": block.prev_hash,
-                    "new_hash": block.hash,
-                    "reward": rewards[miner_id]
-                }
-            )
\ No newline at end of file
+    return response_formatter.format_response(
+        "204 Block mined",
+        data={
+            "block_id": block.id,
+            "prev_hash": block.prev_hash,
+            "new_hash": block.hash,
+            "reward": reward
+        }
+    )
@@ -1,40 +1,179 @@
 import json
 import os
-from typing import Dict, Optional
+import threading
+from typing import Dict, List, Optional
 
 class RewardHandler:
-    def __init__(self, file_path: str = "rewards.json"):
+    """
+    Балансы наград майнеров.
+
+    Каждое начисление или сброс дописывается одной компактной строкой
+    {"seq": n, ...} в журнал (rewards.log рядом со снимком), балансы
+    хранятся в памяти. Раз в compact_every записей балансы сохраняются
+    в снимок file_path вместе с номером последней учтенной записи, и
+    журнал обнуляется. При запуске загружается снимок и дочитываются
+    записи журнала с номером больше снимка.
+
+    fsync=True - журнал синхронизируется при каждой дописи, как блоки
+    в режиме durability "block"; при fsync=False подтвержденные
+    начисления могут потеряться при сбое питания.
+    """
+
+    LEDGER_SUFFIX = ".log"
+
+    def __init__(self, file_path: str = "rewards.json", compact_every: int = 1000, fsync: bool = True):
         self.file_path = file_path
+        self.ledger_path = os.path.splitext(file_path)[0] + self.LEDGER_SUFFIX
+        self.compact_every = compact_every
+        self.fsync = fsync
         self.rewards: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+        self._seq = 0
+        self._pending: List[str] = []
+        self._ledger_records = 0
+        self._ledger = None
         self.load_rewards()
 
     def load_rewards(self) -> None:
-        """Загружает данные из файла. Создает файл, если его нет."""
+        """Загружает снимок и дочитывает журнал. Создает файлы, если их нет."""
+        snapshot_seq = 0
         try:
             if os.path.exists(self.file_path):
                 with open(self.file_path, 'r') as f:
-                    self.rewards = json.load(f)
+                    data = json.load(f)
+                # Старый формат - просто {username: balance}
+                if "rewards" in data and isinstance(data["rewards"], dict):
+                    snapshot_seq = data.get("seq", 0)
+                    self.rewards = data["rewards"]
+                else:
+                    self.rewards = data
             else:
                 self.rewards = {}
-                self.save_rewards()  # Создаем файл при первом запуске
         except Exception as e:
             print(f"Error loading rewards: {str(e)}")
             self.rewards = {}
 
+        self._seq = snapshot_seq
+        self._replay_ledger()
+        self._ledger = open(self.ledger_path, 'a', encoding='utf-8')
+        if not os.path.exists(self.file_path):
+            self.compact()  # Создаем снимок при первом запуске
+
+    def _replay_ledger(self) -> None:
+        """Применяет записи журнала новее снимка, обрезая недописанный хвост"""
+        if not os.path.exists(self.ledger_path):
+            return
+
+        valid_end = 0
+        with open(self.ledger_path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                valid_end += len(line)
+                self._ledger_records += 1
+                # Уже в снимке или повтор после неудачной дописи
+                if record["seq"] <= self._seq:
+                    continue
+                self._apply(record)
+                self._seq = record["seq"]
+
+        if valid_end < os.path.getsize(self.ledger_path):
+            print("Rewards ledger: truncated incomplete tail")
+            with open(self.ledger_path, 'r+b') as f:
+                f.truncate(valid_end)
+
+    def _apply(self, record: dict) -> None:
+        if "reset" in record:
+            if record["reset"] is None:
+                self.rewards = {}
+            else:
+                self.rewards.pop(record["reset"], None)
+        else:
+            self.rewards[record["u"]] = self.rewards.get(record["u"], 0) + record["a"]
+
+    def _record(self, record: dict) -> None:
+        """Нумерует запись и ставит ее в очередь журнала. Вызывается под self.lock"""
+        self._seq += 1
+        record["seq"] = self._seq
+        self._pending.append(json.dumps(record, separators=(',', ':')) + '\n')
+
     def save_rewards(self) -> None:
-        """Сохраняет данные в файл атомарно."""
+        """Дописывает накопленные записи в журнал; при необходимости - сжатие.
+        Если запись не удалась, записи возвращаются в очередь и будут
+        дописаны при следующем вызове."""
         try:
-            temp_path = self.file_path + ".tmp"
-            with open(temp_path, 'w') as f:
-                json.dump(self.rewards, f, indent=2)
-            os.replace(temp_path, self.file_path)
+            with self._save_lock:
+                with self.lock:
+                    pending, self._pending = self._pending, []
+                if pending:
+                    offset = self._ledger.tell()
+                    try:
+                        self._ledger.write(''.join(pending))
+                        self._ledger.flush()
+                        if self.fsync:
+                            os.fsync(self._ledger.fileno())
+                    except Exception:
+                        with self.lock:
+                            self._pending = pending + self._pending
+                        self._reopen_ledger(offset)
+                        raise
+                    self._ledger_records += len(pending)
+                if self._ledger_records >= self.compact_every:
+                    self._compact()
         except Exception as e:
             print(f"Error saving rewards: {str(e)}")
 
-    def add_reward(self, username: str, amount: int = 1) -> None:
-        """Добавляет награды пользователю. Создает запись, если пользователя нет."""
-        self.rewards[username] = self.rewards.get(username, 0) + amount
-        self.save_rewards()
+    def _reopen_ledger(self, offset: int) -> None:
+        """Отбрасывает частично записанную пачку: журнал обрезается до offset"""
+        try:
+            self._ledger.close()
+        except OSError:
+            pass
+        try:
+            with open(self.ledger_path, 'r+b') as f:
+                f.truncate(offset)
+        finally:
+            self._ledger = open(self.ledger_path, 'a', encoding='utf-8')
+
+    def compact(self) -> None:
+        """Сохраняет балансы в снимок и обнуляет журнал"""
+        with self._save_lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        # Снимок учитывает все записи с номером <= seq, в том числе еще
+        # не дописанные в журнал: при загрузке они будут пропущены
+        with self.lock:
+            snapshot = {"seq": self._seq, "rewards": dict(self.rewards)}
+
+        temp_path = self.file_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.file_path)
+
+        self._ledger.close()
+        self._ledger = open(self.ledger_path, 'w', encoding='utf-8')
+        self._ledger_records = 0
+
+    def add_reward(self, username: str, amount: int = 1, save: bool = True) -> int:
+        """Добавляет награды пользователю. Создает запись, если пользователя нет.
+        save=False - только в памяти, запись в журнал при следующем save_rewards().
+        Возвращает новый баланс."""
+        with self.lock:
+            balance = self.rewards.get(username, 0) + amount
+            self.rewards[username] = balance
+            self._record({"u": username, "a": amount})
+        if save:
+            self.save_rewards()
+        return balance
 
     def get_rewards(self, username: str) -> int:
         """Возвращает количество наград. 0 если пользователь не существует."""
@@ -45,12 +184,18 @@ class RewardHandler:
         username: Optional[str] = None
     ) -> None:
         """Сбрасывает награды. Для всех, если username не указан."""
-        if username:
-            if username in self.rewards:
-                del self.rewards[username]
-        else:
-            self.rewards = {}
+        with self.lock:
+            if username:
+                self.rewards.pop(username, None)
+            else:
+                self.rewards = {}
+            self._record({"reset": username or None})
+        self.save_rewards()
+
+    def close(self) -> None:
         self.save_rewards()
+        with self._save_lock:
+            self._ledger.close()
 
     def __str__(self) -> str:
-        return json.dumps(self.rewards, indent=2)
\ No newline at end of file
+        return json.dumps(self.rewards, indent=2)
@@ -0,0 +1,69 @@
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from ..models import User
+from .auth_handler import user_store
+
+
+class SessionManager:
+    """
+    Таблица сессий в памяти: токен -> (пользователь, время истечения).
+    Срок жизни фиксируется при LOGIN и не продлевается. При каждом
+    обращении пользователь сверяется с UserStore: если его удалили или
+    изменили (пароль, роль, статус), сессия отзывается.
+    """
+
+    def __init__(self, ttl_seconds: int = 900):
+        self.ttl_seconds = ttl_seconds
+        self._sessions: Dict[str, Tuple[User, float]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, user: User) -> str:
+        """Создает сессию и возвращает токен"""
+        token = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            self._sessions[token] = (user, now + self.ttl_seconds)
+        return token
+
+    def get(self, token: str) -> Optional[User]:
+        """Возвращает пользователя по токену или None, если сессия истекла
+        или пользователь изменился"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            user, expires_at = session
+            if expires_at < now:
+                del self._sessions[token]
+                return None
+
+        # Вне блокировки: user_store может перечитывать файл
+        current = user_store.get(user.username)
+        if current != user:
+            self.revoke(token)
+            return None
+        return current
+
+    def expires_in(self, token: str) -> int:
+        """Секунд до истечения сессии (0, если ее нет)"""
+        with self._lock:
+            session = self._sessions.get(token)
+        if session is None:
+            return 0
+        return max(0, int(session[1] - time.monotonic()))
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [token for token, (_, expires_at) in self._sessions.items() if expires_at < now]
+        for token in expired:
+            del self._sessions[token]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
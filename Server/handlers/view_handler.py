@@ -1,5 +1,12 @@
-from ..utils import response_formatter
-from ..models import Blockchain
+import json
+from typing import Iterator, List, Optional, Tuple
+from ..utils import response_formatter, LRUCache
+from ..models import Blockchain, Block
+
+BLOCK_FIELDS = ('id', 'prev_hash', 'timestamp', 'diploma_data', 'public_key',
+                'signature', 'nonce', 'difficulty', 'hash')
+# fields=header - заголовок без diploma_data, подписи и PEM
+HEADER_FIELDS = ('id', 'prev_hash', 'timestamp', 'nonce', 'difficulty', 'hash')
 
 def handle_view_block(blockchain: Blockchain, block_id: str) -> str:
     """Обработка запроса на просмотр блока"""
@@ -7,4 +14,157 @@ def handle_view_block(blockchain: Blockchain, block_id: str) -> str:
         block = blockchain.get_block(int(block_id))
         return response_formatter.format_response("VIEW_BLOCK", block)
     except (ValueError, IndexError):
-        return response_formatter.format_error("Invalid block ID")
\ No newline at end of file
+        return response_formatter.format_error("Invalid block ID")
+
+
+def cache_block_response(cache: LRUCache, block: Block) -> None:
+    """Кладет в кэш готовый ответ VIEW_BLOCK для добавленного блока"""
+    response = response_formatter.format_response("VIEW_BLOCK", block.to_dict())
+    cache.put(block.id, response.encode('utf-8'))
+
+
+def handle_view_block_cached(blockchain: Blockchain, block_id: str, cache: LRUCache) -> bytes:
+    """VIEW_BLOCK с кэшем закодированных ответов.
+    Отрицательные id (отсчет от вершины) не кэшируются."""
+    try:
+        position = int(block_id)
+    except ValueError:
+        position = -1
+
+    if position >= 0:
+        cached = cache.get(position)
+        if cached is not None:
+            return cached
+
+    response = handle_view_block(blockchain, block_id).encode('utf-8')
+    if 0 <= position < len(blockchain) and response.startswith(b"OK"):
+        cache.put(position, response)
+    return response
+
+def handle_find_diploma(blockchain: Blockchain, command: str) -> str:
+    """Поиск диплома: FIND_DIPLOMA <field> <value>"""
+    try:
+        _, field, value = command.split(' ', 2)
+        value = value.strip()
+        blocks = blockchain.find_diplomas(field, value)
+    except ValueError:
+        return response_formatter.format_error(
+            "Invalid format: FIND_DIPLOMA <reg_number|institution|full_name> <value>"
+        )
+
+    if not blocks:
+        return response_formatter.format_error("Diploma not found", 404)
+    return response_formatter.format_response("FIND_DIPLOMA", {
+        "field": field,
+        "value": value,
+        "blocks": blocks
+    })
+
+
+def handle_exists(blockchain: Blockchain, command: str) -> str:
+    """Проверка наличия диплома: EXISTS <reg_number>.
+    Отсутствующие номера отсекаются фильтром Блума без обращения к индексу."""
+    try:
+        _, reg_number = command.split(' ', 1)
+        reg_number = reg_number.strip()
+    except ValueError:
+        reg_number = ""
+    if not reg_number:
+        return response_formatter.format_error("Invalid format: EXISTS <reg_number>")
+
+    exists, by_filter = blockchain.reg_number_exists(reg_number)
+    return response_formatter.format_response("EXISTS", {
+        "reg_number": reg_number,
+        "exists": exists,
+        "source": "bloom" if by_filter else "index"
+    })
+
+
+def handle_prove(blockchain: Blockchain, command: str) -> str:
+    """Доказательство включения: PROVE <block_id> [tree_size]"""
+    parts = command.split()
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts[1:]):
+        return response_formatter.format_error("Invalid format: PROVE <block_id> [tree_size]")
+    try:
+        proof = blockchain.prove(*(int(part) for part in parts[1:]))
+    except (ValueError, IndexError):
+        return response_formatter.format_error("Invalid block ID or tree size")
+    return response_formatter.format_response("PROVE", proof)
+
+
+def parse_view_blocks(command: str, chain_length: int) -> Tuple[int, int, Optional[List[str]]]:
+    """
+    Разбор VIEW_BLOCKS <from> <to> [fields=a,b,...|header].
+    to обрезается по вершине цепочки. Возвращает (from, to, поля или None).
+    """
+    parts = command.split()
+    if len(parts) not in (3, 4) or not (parts[1].isdigit() and parts[2].isdigit()):
+        raise ValueError("Invalid format: VIEW_BLOCKS <from> <to> [fields=...]")
+    start, end = int(parts[1]), int(parts[2])
+    if start < 0 or start > end or start >= chain_length:
+        raise ValueError("Invalid block range")
+
+    fields = None
+    if len(parts) == 4:
+        if not parts[3].startswith("fields="):
+            raise ValueError("Invalid format: VIEW_BLOCKS <from> <to> [fields=...]")
+        value = parts[3][len("fields="):]
+        fields = list(HEADER_FIELDS) if value == "header" else value.split(',')
+        unknown = [field for field in fields if field not in BLOCK_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return start, min(end, chain_length - 1), fields
+
+
+def iter_block_lines(
+        blockchain: Blockchain,
+        start: int,
+        end: int,
+        fields: Optional[List[str]] = None
+) -> Iterator[bytes]:
+    """Блоки [start, end] строками NDJSON. Без проекции - записи хранилища как есть"""
+    for block_id in range(start, end + 1):
+        record = blockchain.get_block_bytes(block_id)
+        if fields is not None:
+            data = json.loads(record)
+            record = json.dumps(
+                {field: data[field] for field in fields},
+                ensure_ascii=False, separators=(',', ':')
+            ).encode('utf-8')
+        yield record + b"\n"
+
+
+def stream_view_blocks(
+        blockchain: Blockchain,
+        command: str,
+        chunk_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """
+    Ответ на VIEW_BLOCKS частями не меньше chunk_size байт: заголовок
+    "OK VIEW_BLOCKS" с числом блоков, затем ровно count строк NDJSON.
+    При ошибке разбора - единственная часть с ERROR.
+    """
+    try:
+        start, end, fields = parse_view_blocks(command, len(blockchain))
+    except ValueError as e:
+        yield response_formatter.format_error(str(e)).encode('utf-8')
+        return
+
+    yield response_formatter.format_response("VIEW_BLOCKS", {
+        "from": start,
+        "to": end,
+        "count": end - start + 1,
+        "fields": fields or list(BLOCK_FIELDS)
+    }).encode('utf-8')
+
+    chunk = []
+    size = 0
+    for line in iter_block_lines(blockchain, start, end, fields):
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b"".join(chunk)
@@ -4,11 +4,15 @@ from time import time
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import rsa
-import os
 from .DiplomaGenerator import DiplomaGenerator
 
 
 class Block:
+    # Поля, входящие в hash_info(); запись в любое из них сбрасывает кэш префикса
+    _HASH_INFO_FIELDS = frozenset(
+        {'prev_hash', 'timestamp', 'diploma_data', 'public_key_pem', 'signature'}
+    )
+
     def __init__(self, block_id: int, diploma_data: dict, public_key: rsa.RSAPublicKey, prev_hash: str = None):
         self.id = block_id
         self.prev_hash = prev_hash
@@ -24,6 +28,7 @@ class Block:
         self.hash = self.calculate_hash()
 
         self._validate_diploma(public_key)
+        self.verified = True
 
     def _validate_diploma(self, public_key: rsa.RSAPublicKey):
         """Проверка валидности подписи диплома"""
@@ -32,29 +37,72 @@ class Block:
             raise ValueError("Invalid diploma signature!")
 
     def verify_diploma(self) -> bool:
-        """Проверяет подпись диплома"""
+        """Проверяет подпись диплома (успешный результат кэшируется)"""
+        if self.verified:
+            return True
         try:
             public_key = serialization.load_pem_public_key(
                 self.public_key_pem.encode('utf-8'),
                 backend=default_backend()
             )
-            return DiplomaGenerator(self.diploma_data.copy()).verify(public_key)
+            self.verified = DiplomaGenerator(self.diploma_data.copy()).verify(public_key)
         except Exception:
-            return False
-
-    def calculate_hash(self) -> str:
-        data_string = (
-                str(self.prev_hash) +
-                str(self.timestamp) +
-                json.dumps(self.diploma_data, sort_keys=True) +
-                self.public_key_pem +
-                self.signature +
-                str(self.nonce) +
-                str(self.difficulty))
-        return sha256(data_string.encode('utf-8')).hexdigest()
+            self.verified = False
+        return self.verified
+
+    def __setattr__(self, name, value):
+        if name in self._HASH_INFO_FIELDS:
+            self.invalidate_hash_cache()
+        super().__setattr__(name, value)
+
+    def invalidate_hash_cache(self) -> None:
+        """Сбрасывает кэш hash_info() и SHA-256 midstate.
+
+        Вызывается автоматически при присваивании полей из _HASH_INFO_FIELDS;
+        при изменении diploma_data на месте нужно вызвать вручную.
+        """
+        self.__dict__.pop('_hash_info', None)
+        self.__dict__.pop('_hash_prefix', None)
+
+    def _get_hash_prefix(self):
+        """SHA-256 midstate от hash_info(), вычисляется один раз"""
+        prefix = self.__dict__.get('_hash_prefix')
+        if prefix is None:
+            prefix = sha256(self.hash_info().encode('utf-8'))
+            self.__dict__['_hash_prefix'] = prefix
+        return prefix
+
+    def hash_prefix(self):
+        """Копия SHA-256 midstate от hash_info(); ее можно дохэшировать в
+        finish_hash() без доступа к блоку"""
+        return self._get_hash_prefix().copy()
+
+    def hash_with_nonce(self, nonce: int) -> str:
+        """Хэш блока для заданного nonce (дохэширует только суффикс)"""
+        return self.finish_hash(self.hash_prefix(), nonce, self.difficulty)
+
+    @staticmethod
+    def finish_hash(prefix, nonce: int, difficulty: int) -> str:
+        """Дохэширует суффикс в копии midstate; блок для этого не нужен"""
+        prefix.update((str(nonce) + str(difficulty)).encode('utf-8'))
+        return prefix.hexdigest()
+
+    def calculate_hash(self, use_cache: bool = True) -> str:
+        """Хэш блока. use_cache=False - с нуля, без кэша hash_info() и
+        midstate: для проверок целостности, где diploma_data могли изменить на месте"""
+        if use_cache:
+            return self.hash_with_nonce(self.nonce)
+        return self.finish_hash(sha256(self._build_hash_info().encode('utf-8')), self.nonce, self.difficulty)
 
     def hash_info(self) -> str:
         """Data used as the base for mining (excludes nonce and difficulty)"""
+        info = self.__dict__.get('_hash_info')
+        if info is None:
+            info = self._build_hash_info()
+            self.__dict__['_hash_info'] = info
+        return info
+
+    def _build_hash_info(self) -> str:
         return (
                 str(self.prev_hash) +
                 str(self.timestamp) +
@@ -64,26 +112,15 @@ class Block:
         )
 
     def mine(self) -> None:
-        while self.hash[:self.difficulty] != '0' * self.difficulty:
+        prefix = self._get_hash_prefix()
+        suffix = str(self.difficulty).encode('utf-8')
+        target = '0' * self.difficulty
+        while not self.hash.startswith(target):
             self.nonce += 1
-            self.hash = self.calculate_hash()
+            hasher = prefix.copy()
+            hasher.update(str(self.nonce).encode('utf-8') + suffix)
+            self.hash = hasher.hexdigest()
 
-    def save_to_file(self, folder: str) -> None:
-        os.makedirs(folder, exist_ok=True)
-        filename = os.path.join(folder, f"Block_{self.id:05d}.json")
-        data = {
-            "id": self.id,
-            "prev_hash": self.prev_hash,
-            "timestamp": self.timestamp,
-            "diploma_data": self.diploma_data,
-            "public_key": self.public_key_pem,
-            "signature": self.signature,
-            "nonce": self.nonce,
-            "difficulty": self.difficulty,
-            "hash": self.hash
-        }
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
     def to_dict(self):
         data = {
             "id": self.id,
@@ -99,8 +136,29 @@ class Block:
         return data
 
     @classmethod
-    def from_dict(cls, data: dict) -> 'Block':
-        """Создает блок из словаря данных"""
+    def _from_trusted_dict(cls, data: dict) -> 'Block':
+        """Создает блок без разбора PEM и проверки подписи.
+        Подпись проверяется позже через verify_diploma()."""
+        block = cls.__new__(cls)
+        block.id = data['id']
+        block.prev_hash = data['prev_hash']
+        block.timestamp = data['timestamp']
+        block.diploma_data = data['diploma_data']
+        block.public_key_pem = data['public_key']
+        block.signature = data['signature']
+        block.nonce = data['nonce']
+        block.difficulty = data['difficulty']
+        block.verified = False
+        block.hash = data['hash'] or block.calculate_hash()
+        return block
+
+    @classmethod
+    def from_dict(cls, data: dict, trusted: bool = False) -> 'Block':
+        """Создает блок из словаря данных.
+        При trusted=True RSA-проверка подписи откладывается."""
+        if trusted:
+            return cls._from_trusted_dict(data)
+
         public_key = serialization.load_pem_public_key(
             data['public_key'].encode('utf-8'),
             backend=default_backend()
@@ -122,10 +180,13 @@ class Block:
 
 
     @classmethod
-    def from_file(cls, filename: str) -> 'Block':
+    def from_file(cls, filename: str, trusted: bool = False) -> 'Block':
         with open(filename, 'r', encoding='utf-8') as f:
             data = json.load(f)
 
+        if trusted:
+            return cls._from_trusted_dict(data)
+
         public_key = serialization.load_pem_public_key(
             data['public_key'].encode('utf-8'),
             backend=default_backend()
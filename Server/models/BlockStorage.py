@@ -0,0 +1,285 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, Optional
+
+
+class BlockStorage:
+    """
+    Append-only хранилище блоков в сегментных лог-файлах.
+
+    Каждый блок записывается как запись <length:u32><crc32:u32><json>
+    в конец активного сегмента (chain_XXXXXXXX.seg). При превышении
+    segment_size открывается новый сегмент. Индекс позиция -> (сегмент,
+    смещение, длина) хранится в памяти в виде массивов и дублируется
+    в chain.idx; при повреждении или отсутствии индекс восстанавливается
+    сканированием сегментов. Чтение идет через mmap.
+    """
+
+    SEGMENT_PREFIX = "chain_"
+    SEGMENT_SUFFIX = ".seg"
+    INDEX_FILE = "chain.idx"
+    LEGACY_PREFIX = "Block_"
+
+    _HEADER = struct.Struct('>II')       # length, crc32
+    _INDEX_ENTRY = struct.Struct('<IQI')  # segment, offset, length
+
+    def __init__(self, path: str, segment_size: int = 64 * 1024 * 1024):
+        self.path = path
+        self.segment_size = segment_size
+        self.lock = threading.RLock()
+
+        self._segments = array('I')
+        self._offsets = array('Q')
+        self._lengths = array('I')
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._active_segment = 0
+        self._active_size = 0
+        self._segment_file = None
+        self._index_file = None
+
+        os.makedirs(self.path, exist_ok=True)
+        self._open()
+
+    # ------------------------------------------------------------------
+    # Открытие и восстановление
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"{self.SEGMENT_PREFIX}{segment:08d}{self.SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> list:
+        segments = []
+        for name in os.listdir(self.path):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
+                segments.append(int(name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]))
+        return sorted(segments)
+
+    def _open(self) -> None:
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        segments = self._list_segments()
+        sizes = {s: os.path.getsize(self._segment_path(s)) for s in segments}
+
+        # Загрузка индекса, отбрасываем записи, не подтвержденные сегментами
+        index_dirty = False
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                raw = f.read()
+            usable = len(raw) - len(raw) % self._INDEX_ENTRY.size
+            index_dirty = usable != len(raw)
+            for segment, offset, length in self._INDEX_ENTRY.iter_unpack(raw[:usable]):
+                end = offset + self._HEADER.size + length
+                if sizes.get(segment, -1) < end:
+                    index_dirty = True
+                    break
+                self._append_index(segment, offset, length)
+        elif segments:
+            index_dirty = True
+
+        # Досканирование хвоста: записи, которые попали в сегмент, но не в индекс
+        if len(self):
+            scan_segment = self._segments[-1]
+            scan_offset = self._offsets[-1] + self._HEADER.size + self._lengths[-1]
+        else:
+            scan_segment = segments[0] if segments else 0
+            scan_offset = 0
+
+        for segment in [s for s in segments if s >= scan_segment]:
+            start = scan_offset if segment == scan_segment else 0
+            valid_end = self._scan_segment(segment, start)
+            if valid_end != start:
+                index_dirty = True
+            if valid_end < sizes[segment]:
+                # Обрезанный или поврежденный хвост - все последующее недостоверно
+                with open(self._segment_path(segment), 'r+b') as f:
+                    f.truncate(valid_end)
+                sizes[segment] = valid_end
+                for later in [s for s in segments if s > segment]:
+                    os.remove(self._segment_path(later))
+                    del sizes[later]
+                break
+
+        if index_dirty:
+            self._rewrite_index(index_path)
+
+        self._active_segment = max(sizes) if sizes else 0
+        self._active_size = sizes.get(self._active_segment, 0)
+        self._segment_file = open(self._segment_path(self._active_segment), 'ab')
+        self._index_file = open(index_path, 'ab')
+
+    def _scan_segment(self, segment: int, offset: int) -> int:
+        """Добавляет в индекс валидные записи сегмента начиная с offset.
+        Возвращает смещение конца последней валидной записи."""
+        with open(self._segment_path(segment), 'rb') as f:
+            data = f.read()
+
+        while offset + self._HEADER.size <= len(data):
+            length, crc = self._HEADER.unpack_from(data, offset)
+            start = offset + self._HEADER.size
+            payload = data[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            self._append_index(segment, offset, length)
+            offset = start + length
+        return offset
+
+    def _append_index(self, segment: int, offset: int, length: int) -> None:
+        self._segments.append(segment)
+        self._offsets.append(offset)
+        self._lengths.append(length)
+
+    def _rewrite_index(self, index_path: str) -> None:
+        temp_path = index_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            for position in range(len(self)):
+                f.write(self._INDEX_ENTRY.pack(
+                    self._segments[position],
+                    self._offsets[position],
+                    self._lengths[position]
+                ))
+        os.replace(temp_path, index_path)
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def encode(record: dict) -> bytes:
+        """Компактная JSON-сериализация записи"""
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def append(self, record: dict) -> int:
+        """Дописывает запись в конец лога. Возвращает ее позицию."""
+        return self.append_encoded(self.encode(record))
+
+    def append_encoded(self, payload: bytes) -> int:
+        """Дописывает уже сериализованную запись в конец лога"""
+        return self.append_many([payload])
+
+    def append_many(self, payloads: Iterable[bytes]) -> int:
+        """
+        Дописывает пачку сериализованных записей и сбрасывает буферы один
+        раз на пачку. Данные попадают в кэш ОС; для fsync - sync().
+        Возвращает позицию последней записи.
+        """
+        with self.lock:
+            for payload in payloads:
+                self._write_record(payload)
+            self._segment_file.flush()
+            self._index_file.flush()
+            return len(self) - 1
+
+    def _write_record(self, payload: bytes) -> None:
+        if self._active_size and self._active_size + self._HEADER.size + len(payload) > self.segment_size:
+            self._roll_segment()
+
+        offset = self._active_size
+        self._segment_file.write(self._HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._segment_file.write(payload)
+        self._active_size += self._HEADER.size + len(payload)
+
+        self._index_file.write(self._INDEX_ENTRY.pack(self._active_segment, offset, len(payload)))
+        self._append_index(self._active_segment, offset, len(payload))
+
+    def sync(self) -> None:
+        """
+        fsync активного сегмента. Индекс не синхронизируется: при открытии
+        он сверяется с сегментами и досканируется с хвоста.
+        """
+        with self.lock:
+            self._segment_file.flush()
+            os.fsync(self._segment_file.fileno())
+
+    def _roll_segment(self) -> None:
+        # Закрываемый сегмент больше не попадет в sync()
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+        self._segment_file.close()
+        self._active_segment += 1
+        self._active_size = 0
+        self._segment_file = open(self._segment_path(self._active_segment), 'ab')
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def _get_map(self, segment: int, needed_end: int) -> mmap.mmap:
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < needed_end:
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def read_bytes(self, position: int) -> bytes:
+        """Возвращает сериализованную запись по позиции"""
+        with self.lock:
+            if position < 0:
+                position += len(self)
+            if position < 0 or position >= len(self):
+                raise IndexError("Block position out of range")
+
+            segment = self._segments[position]
+            start = self._offsets[position] + self._HEADER.size
+            end = start + self._lengths[position]
+            return self._get_map(segment, end)[start:end]
+
+    def read(self, position: int) -> dict:
+        """Возвращает запись по позиции"""
+        return json.loads(self.read_bytes(position))
+
+    def iter_records(self, start: int = 0) -> Iterator[dict]:
+        """Последовательно возвращает записи начиная с позиции start"""
+        for position in range(start, len(self)):
+            yield self.read(position)
+
+    # ------------------------------------------------------------------
+    # Миграция со старого формата
+    # ------------------------------------------------------------------
+
+    def migrate_from_files(self, folder: Optional[str] = None) -> int:
+        """
+        Однократный импорт блоков из формата Block_XXXXX.json.
+        Выполняется только для пустого хранилища. Исходные файлы
+        не удаляются. Возвращает число импортированных блоков.
+        """
+        folder = folder or self.path
+        with self.lock:
+            if len(self):
+                return 0
+
+            block_files = sorted(
+                [f for f in os.listdir(folder)
+                 if f.startswith(self.LEGACY_PREFIX) and f.endswith(".json")],
+                key=lambda x: int(x.split('_')[1].split('.')[0]))
+
+            for filename in block_files:
+                with open(os.path.join(folder, filename), 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+                if record.get('id') != len(self):
+                    raise RuntimeError(f"Unexpected block id in {filename}: {record.get('id')}")
+                self.append(record)
+
+            return len(block_files)
+
+    def close(self) -> None:
+        with self.lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            if self._segment_file:
+                self._segment_file.close()
+            if self._index_file:
+                self._index_file.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __repr__(self) -> str:
+        return f"BlockStorage({len(self)} records, segment={self._active_segment})"
@@ -0,0 +1,177 @@
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Callable, Deque, Dict, List, Optional
+from .Block import Block
+from .BlockStorage import BlockStorage
+
+
+class BlockWriter(threading.Thread):
+    """
+    Фоновая запись принятых блоков в BlockStorage с групповой фиксацией.
+
+    Блоки, накопившиеся в очереди, пишутся одной пачкой. Режимы durability:
+        "block"    - fsync на каждую пачку до подтверждения (ни один
+                     подтвержденный блок не теряется при сбое питания);
+        "interval" - подтверждение после записи в кэш ОС, fsync не реже
+                     чем раз в sync_interval_ms;
+        "os"       - только запись в кэш ОС, fsync не выполняется.
+    """
+
+    DURABILITY_MODES = ("block", "interval", "os")
+    # Сколько последних замеров хранится для перцентилей
+    LATENCY_SAMPLES = 1024
+
+    def __init__(
+            self,
+            storage: BlockStorage,
+            on_written: Optional[Callable[[List[Block]], None]] = None,
+            durability: str = "block",
+            sync_interval_ms: float = 50.0,
+            max_batch: int = 1024
+    ):
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        super().__init__(name="block-writer", daemon=True)
+        self.storage = storage
+        self.on_written = on_written
+        self.durability = durability
+        self.sync_interval = sync_interval_ms / 1000
+        self.max_batch = max_batch
+
+        self.condition = threading.Condition()
+        self._queue: Deque[tuple] = deque()
+        self._submitted = 0
+        self._persisted = 0
+        self._dirty = False
+        self._last_sync = perf_counter()
+        self._stopping = False
+        self.error: Optional[Exception] = None
+
+        self.batches = 0
+        self.blocks = 0
+        self.syncs = 0
+        self._write_latency: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+        self._sync_latency: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+        self._commit_latency: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+
+    def submit(self, block: Block) -> int:
+        """Ставит блок в очередь записи. Возвращает номер для wait()"""
+        with self.condition:
+            self._submitted += 1
+            self._queue.append((block, perf_counter()))
+            self.condition.notify_all()
+            return self._submitted
+
+    def wait(self, ticket: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Ждет подтверждения записи блока с номером ticket (по умолчанию -
+        всех поставленных). Возвращает False по таймауту.
+        """
+        with self.condition:
+            target = self._submitted if ticket is None else ticket
+            done = self.condition.wait_for(
+                lambda: self._persisted >= target or self.error is not None, timeout
+            )
+            if self.error is not None:
+                raise RuntimeError(f"Block persistence failed: {self.error}")
+            return done
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self._queue and not self._stopping and not self._sync_due():
+                    self.condition.wait(self._sync_timeout())
+                if self._stopping and not self._queue:
+                    break
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch))]
+
+            try:
+                if batch:
+                    self._write_batch(batch)
+                elif self._sync_due():
+                    self._sync()
+            except Exception as e:
+                print(f"Block writer error: {str(e)}")
+                with self.condition:
+                    self.error = e
+                    self.condition.notify_all()
+                return
+
+        if self._dirty and self.durability != "os":
+            self._sync()
+
+    def _write_batch(self, batch: List[tuple]) -> None:
+        started = perf_counter()
+        self.storage.append_many(self.storage.encode(block.to_dict()) for block, _ in batch)
+        written = perf_counter()
+        self._write_latency.append(written - started)
+        self._dirty = True
+
+        if self.durability == "block":
+            self._sync()
+
+        blocks = [block for block, _ in batch]
+        if self.on_written:
+            self.on_written(blocks)
+
+        acknowledged = perf_counter()
+        for _, submitted_at in batch:
+            self._commit_latency.append(acknowledged - submitted_at)
+        self.batches += 1
+        self.blocks += len(batch)
+
+        with self.condition:
+            self._persisted += len(batch)
+            self.condition.notify_all()
+
+    def _sync(self) -> None:
+        started = perf_counter()
+        self.storage.sync()
+        self._sync_latency.append(perf_counter() - started)
+        self._last_sync = perf_counter()
+        self._dirty = False
+        self.syncs += 1
+
+    def _sync_due(self) -> bool:
+        return (self.durability == "interval" and self._dirty
+                and perf_counter() - self._last_sync >= self.sync_interval)
+
+    def _sync_timeout(self) -> Optional[float]:
+        if self.durability == "interval" and self._dirty:
+            return max(0.0, self.sync_interval - (perf_counter() - self._last_sync))
+        return None
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Дописывает очередь, выполняет финальный fsync и останавливает поток"""
+        with self.condition:
+            self._stopping = True
+            self.condition.notify_all()
+        if self.is_alive():
+            self.join(timeout)
+
+    @staticmethod
+    def _summary(samples: Deque[float]) -> Dict[str, float]:
+        if not samples:
+            return {"avg_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(samples)
+        return {
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3)
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "durability": self.durability,
+            "pending": len(self._queue),
+            "batches": self.batches,
+            "blocks": self.blocks,
+            "avg_batch": round(self.blocks / self.batches, 2) if self.batches else 0.0,
+            "syncs": self.syncs,
+            "write_latency": self._summary(self._write_latency),
+            "sync_latency": self._summary(self._sync_latency),
+            "commit_latency": self._summary(self._commit_latency),
+            "error": str(self.error) if self.error else None
+        }
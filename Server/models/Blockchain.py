@@ -1,22 +1,72 @@
+import json
 import os
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Set, Iterable, Union, Callable, Tuple
 from cryptography.hazmat.primitives.asymmetric import rsa
 from .DiplomaGenerator import DiplomaGenerator
 from .KeyManager import KeyManager
 from .Block import Block
+from .BlockStorage import BlockStorage
+from .ChainValidator import ChainValidator
+from .DiplomaIndex import DiplomaIndex
+from .LazyChain import LazyChain
+from .BlockWriter import BlockWriter
+from .MerkleTree import MerkleTree
+from .BloomFilter import BloomFilter
 class Blockchain:
+    # Начиная с этого числа блоков проверка идет в пуле процессов
+    PARALLEL_THRESHOLD = 256
+
     def __init__(
             self,
             path: str = "Blockchain",
             diploma_data: Optional[Dict] = None,
-            public_key: Optional[rsa.RSAPublicKey] = None
+            public_key: Optional[rsa.RSAPublicKey] = None,
+            verify_on_load: bool = False,
+            workers: Optional[int] = None,
+            lazy: bool = False,
+            cache_size: int = 1024,
+            durability: str = "block",
+            sync_interval_ms: float = 50.0,
+            bloom_capacity: int = 1000000,
+            bloom_fp_rate: float = 0.001
     ):
-        self.chain: List[Block] = []
         self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        self.storage = BlockStorage(self.path)
+
+        # lazy=True - в памяти только заголовки, блоки читаются из
+        # хранилища через LRU-кэш на cache_size блоков
+        self.lazy = lazy
+        self.chain: Union[List[Block], LazyChain] = (
+            LazyChain(self.storage, cache_size) if lazy else []
+        )
         self.current_id = 0
         self.difficulty = 4
+        # False - блоки загружаются без RSA-проверки, подписи проверяются
+        # лениво в validate_chain и запоминаются в verified_path
+        self.verify_on_load = verify_on_load
+        self.workers = workers or os.cpu_count() or 1
 
-        os.makedirs(self.path, exist_ok=True)
+        self.verified_path = os.path.join(self.path, "verified.log")
+        self.verified_hashes: Set[str] = self._load_verified()
+        self.checkpoint_path = os.path.join(self.path, "checkpoint.json")
+        self.index = DiplomaIndex()
+        # Дерево Меркла над хэшами блоков для доказательств включения
+        self.merkle = MerkleTree()
+        # Фильтр Блума по reg_number для быстрых отрицательных ответов EXISTS
+        self.bloom_path = os.path.join(self.path, "reg_numbers.bloom")
+        self.reg_filter = self._open_reg_filter(bloom_capacity, bloom_fp_rate)
+        self.exists_stats = {"negatives": 0, "positives": 0, "false_positives": 0}
+        self.commit_listeners: List[Callable[[Block], None]] = []
+        # Блоки, принятые через commit_block, пишутся фоновым потоком
+        # пачками; durability - политика fsync (см. BlockWriter)
+        self.writer = BlockWriter(
+            self.storage,
+            on_written=self._on_blocks_written,
+            durability=durability,
+            sync_interval_ms=sync_interval_ms
+        )
+        self.writer.start()
 
         try:
             has_blocks = self._load_chain()
@@ -37,25 +87,114 @@ class Blockchain:
                 #    )
 
     def _load_chain(self) -> bool:
-        """Загружает цепочку из файлов. Возвращает True если блоки найдены, False если папка пустая"""
+        """Загружает цепочку из хранилища. Возвращает True если блоки найдены, False если оно пустое"""
         try:
-            block_files = sorted(
-                [f for f in os.listdir(self.path) if f.startswith("Block_")],
-                key=lambda x: int(x.split('_')[1].split('.')[0]))
+            if len(self.storage) == 0:
+                # Однократная миграция со старого формата Block_XXXXX.json
+                migrated = self.storage.migrate_from_files(self.path)
+                if migrated:
+                    print(f"Migrated {migrated} blocks to segment storage")
 
-            if not block_files:  # Нет файлов блоков
+            if len(self.storage) == 0:  # Нет блоков
                 return False
 
-            for filename in block_files:
-                block = Block.from_file(os.path.join(self.path, filename))
-                self.chain.append(block)
-                self.current_id = max(self.current_id, block.id + 1)
+            for position, record in enumerate(self.storage.iter_records()):
+                if position >= self.reg_filter.height:
+                    self._add_to_reg_filter(record['diploma_data'])
+                if self.lazy:
+                    self.chain.append_header(record['hash'], record['prev_hash'])
+                else:
+                    self.chain.append(Block.from_dict(record, trusted=True))
+                self.index.add(record['id'], record['diploma_data'])
+                self.merkle.append(record['hash'])
+                self.current_id = max(self.current_id, record['id'] + 1)
+
+            if self.verify_on_load:
+                self._verify_signatures_on_load()
 
             return True
 
         except Exception as e:
             raise RuntimeError(f"Chain loading failed: {str(e)}")
 
+    def _open_reg_filter(self, capacity: int, fp_rate: float) -> BloomFilter:
+        """
+        Загружает сохраненный фильтр; новые блоки дочитываются в _load_chain.
+        Фильтр строится заново, если файла нет, он поврежден, создан с
+        другой fp_rate, опережает хранилище или переполнен.
+        """
+        stored = len(self.storage)
+        bloom = BloomFilter.load(self.bloom_path)
+        if (bloom is not None and bloom.fp_rate == fp_rate
+                and bloom.height <= stored and bloom.capacity >= stored):
+            return bloom
+        return BloomFilter(max(capacity, 2 * stored), fp_rate)
+
+    def _add_to_reg_filter(self, diploma_data: dict) -> None:
+        if 'reg_number' in diploma_data:
+            self.reg_filter.add(DiplomaIndex.normalize('reg_number', diploma_data['reg_number']))
+        self.reg_filter.height += 1
+
+    def reg_number_exists(self, reg_number: str) -> Tuple[bool, bool]:
+        """
+        Есть ли в цепочке диплом с таким reg_number.
+        Возвращает (есть ли, ответ дан фильтром Блума без обращения к индексу).
+        """
+        key = DiplomaIndex.normalize('reg_number', reg_number)
+        if key not in self.reg_filter:
+            self.exists_stats["negatives"] += 1
+            return False, True
+        exists = bool(self.index.find('reg_number', key))
+        self.exists_stats["positives" if exists else "false_positives"] += 1
+        return exists, False
+
+    def bloom_stats(self) -> Dict:
+        checked_absent = self.exists_stats["negatives"] + self.exists_stats["false_positives"]
+        return {
+            **self.reg_filter.stats(),
+            **self.exists_stats,
+            "observed_fp_rate": (
+                self.exists_stats["false_positives"] / checked_absent if checked_absent else 0.0
+            )
+        }
+
+    def _block_hash(self, index: int) -> str:
+        """Хэш блока без подгрузки блока целиком в ленивом режиме"""
+        if self.lazy:
+            return self.chain.hash_at(index)
+        return self.chain[index].hash
+
+    def _verify_signatures_on_load(self) -> None:
+        """Проверка подписей всех непроверенных блоков; пул процессов -
+        только начиная с PARALLEL_THRESHOLD блоков"""
+        positions = [i for i in range(len(self.chain)) if self._block_hash(i) not in self.verified_hashes]
+        if not positions:
+            return
+        workers = self.workers if len(positions) >= self.PARALLEL_THRESHOLD else 1
+        items = [(i, self.storage.read_bytes(i), True) for i in positions]
+        results = ChainValidator(workers).check(items)
+
+        for position, result in zip(positions, results):
+            if not result.signature_valid:
+                raise ValueError(f"Invalid diploma signature in block {position}")
+        self._mark_verified(result.hash for result in results)
+
+    def _load_verified(self) -> Set[str]:
+        """Загружает множество хэшей блоков с уже проверенной подписью"""
+        if not os.path.exists(self.verified_path):
+            return set()
+        with open(self.verified_path, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def _mark_verified(self, hashes: Iterable[str]) -> None:
+        """Дописывает хэши проверенных блоков в verified_path"""
+        new_hashes = [h for h in hashes if h not in self.verified_hashes]
+        if not new_hashes:
+            return
+        self.verified_hashes.update(new_hashes)
+        with open(self.verified_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(h + '\n' for h in new_hashes))
+
     def _create_genesis_block(self, data: Dict, public_key: rsa.RSAPublicKey):
         if 'signature' not in data:
             raise ValueError("Genesis data must be signed")
@@ -68,22 +207,74 @@ class Blockchain:
         )
         genesis.mine()
         self.chain.append(genesis)
+        self.index.add(genesis.id, genesis.diploma_data)
+        self.merkle.append(genesis.hash)
+        self._add_to_reg_filter(genesis.diploma_data)
         self.current_id = 1
-        genesis.save_to_file(self.path)
+        self.storage.append(genesis.to_dict())
+        self.storage.sync()
+        self._mark_verified([genesis.hash])
 
     def add_block(self, block: Block):
+        self.flush_pending(self.commit_block(block))
+
+    def tip_hash(self) -> str:
+        return self._block_hash(-1)
+
+    def commit_block(self, block: Block) -> int:
+        """
+        Принимает блок в цепочку в памяти: проверка связи с вершиной,
+        добавление в chain и индекс. Запись на диск, отметка проверенной
+        подписи и commit-слушатели выполняет поток BlockWriter; дождаться
+        их можно через flush_pending() после освобождения своей блокировки.
+        Возвращает номер записи для flush_pending().
+        """
         if self.chain:
-            if block.prev_hash != self.chain[-1].hash:
+            if block.prev_hash != self._block_hash(-1):
                 raise ValueError("Previous hash mismatch")
             if block.id != self.current_id:
                 raise ValueError("Invalid block ID")
 
-        block.save_to_file(self.path)
         self.chain.append(block)
+        self.index.add(block.id, block.diploma_data)
+        self.merkle.append(block.hash)
+        self._add_to_reg_filter(block.diploma_data)
         self.current_id += 1
+        return self.writer.submit(block)
+
+    def flush_pending(self, ticket: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Ждет записи блока ticket (по умолчанию - всех принятых) согласно durability"""
+        return self.writer.wait(ticket, timeout)
+
+    def _on_blocks_written(self, blocks: List[Block]) -> None:
+        """Вызывается потоком BlockWriter после записи пачки"""
+        if self.lazy:
+            for block in blocks:
+                self.chain.release(block.id)
+        self._mark_verified(block.hash for block in blocks if block.verified)
+
+        for block in blocks:
+            for listener in self.commit_listeners:
+                try:
+                    listener(block)
+                except Exception as e:
+                    print(f"Commit listener error: {str(e)}")
+
+    def persistence_stats(self) -> Dict:
+        return self.writer.stats()
+
+    def close(self) -> None:
+        """Дописывает очередь записи, сохраняет фильтр Блума и закрывает хранилище"""
+        self.writer.close()
+        self.reg_filter.save(self.bloom_path)
+        self.storage.close()
+
+    def add_commit_listener(self, listener: Callable[[Block], None]) -> None:
+        """Регистрирует функцию, вызываемую после добавления каждого блока"""
+        self.commit_listeners.append(listener)
 
     def create_and_add_block(self, diploma_data: dict, public_key: rsa.RSAPublicKey):
-        prev_hash = self.chain[-1].hash if self.chain else "0" * 64
+        prev_hash = self._block_hash(-1) if self.chain else "0" * 64
         new_block = Block(
             block_id=self.current_id,
             diploma_data=diploma_data,
@@ -93,25 +284,88 @@ class Blockchain:
         new_block.mine()
         self.add_block(new_block)
 
-    def validate_chain(self, start: int = 0, end: Optional[int] = None) -> bool:
+    def _load_checkpoint(self) -> Optional[Dict]:
+        """Загружает контрольную точку валидации {"height": H, "hash": X}"""
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_checkpoint(self, height: int) -> None:
+        """Сохраняет контрольную точку атомарно"""
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"height": height, "hash": self._block_hash(height)}, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _checkpoint_resume_height(self) -> int:
+        """Высота, с которой продолжать валидацию. 0 - если контрольная
+        точка отсутствует или блок H изменился."""
+        checkpoint = self._load_checkpoint()
+        if not checkpoint:
+            return 0
+        try:
+            height = int(checkpoint["height"])
+            block = self.chain[height]
+            if block.hash != checkpoint["hash"] or block.hash != block.calculate_hash(use_cache=False):
+                return 0
+            return height + 1
+        except (KeyError, ValueError, TypeError, IndexError):
+            return 0
+
+    def validate_chain(
+            self,
+            start: int = 0,
+            end: Optional[int] = None,
+            workers: Optional[int] = None,
+            full: bool = False
+    ) -> bool:
+        """
+        Проверяет цепочку. Без явного диапазона проверка инкрементальная:
+        проверяются только блоки после сохраненной контрольной точки.
+        full=True - проверить всю цепочку заново.
+        """
         if not self.chain:
             return True
+        # Проверка читает записи из хранилища
+        self.flush_pending()
+
+        incremental = start == 0 and end is None
+        if incremental and not full:
+            start = self._checkpoint_resume_height()
+            if start >= len(self.chain):
+                return True
 
         end = end or len(self.chain) - 1
         if start < 0 or end >= len(self.chain) or start > end:
             raise ValueError("Invalid range")
 
+        valid = self._validate_range(start, end, workers)
+        if valid and incremental:
+            self._save_checkpoint(end)
+        return valid
+
+    def _validate_range(self, start: int, end: int, workers: Optional[int] = None) -> bool:
+        workers = workers or self.workers
+        if workers > 1 and end - start + 1 >= self.PARALLEL_THRESHOLD:
+            return self._validate_parallel(start, end, workers)
+
+        newly_verified = []
         try:
             for i in range(start, end + 1):
                 current = self.chain[i]
 
-                if not current.verify_diploma():
+                if current.hash != current.calculate_hash(use_cache=False):
                     return False
 
-                if current.hash != current.calculate_hash():
-                    return False
+                # Подпись проверяется один раз на блок, результат сохраняется
+                if current.hash not in self.verified_hashes:
+                    if not current.verify_diploma():
+                        return False
+                    newly_verified.append(current.hash)
 
-                if i > 0 and current.prev_hash != self.chain[i - 1].hash:
+                if i > 0 and current.prev_hash != self._block_hash(i - 1):
                     return False
 
                 if not current.hash.startswith('0' * current.difficulty):
@@ -120,6 +374,33 @@ class Blockchain:
             return True
         except Exception:
             return False
+        finally:
+            self._mark_verified(newly_verified)
+
+    def _validate_parallel(self, start: int, end: int, workers: int) -> bool:
+        """validate_chain через пул процессов: независимые проверки блоков
+        в воркерах, связность prev_hash - здесь"""
+        try:
+            items = [
+                (i, self.storage.read_bytes(i), self._block_hash(i) not in self.verified_hashes)
+                for i in range(start, end + 1)
+            ]
+            results = ChainValidator(workers).check(items)
+        except Exception:
+            return False
+
+        verified = []
+        valid = True
+        for i, result in zip(range(start, end + 1), results):
+            if not result.valid or result.hash != self._block_hash(i):
+                valid = False
+                break
+            if result.signature_valid:
+                verified.append(result.hash)
+        self._mark_verified(verified)
+
+        prev_hash = self._block_hash(start - 1) if start > 0 else None
+        return valid and ChainValidator.check_linkage(results, prev_hash)
 
     def print_chain_info(self):
         """Выводит подробную информацию о блокчейне"""
@@ -158,6 +439,37 @@ class Blockchain:
     def get_block(self, block_id):
         return (self.chain[block_id]).to_dict()
 
+    def get_block_bytes(self, block_id: int) -> bytes:
+        """Компактный JSON блока; записанные блоки отдаются из хранилища без разбора"""
+        if 0 <= block_id < len(self.storage):
+            return self.storage.read_bytes(block_id)
+        return self.storage.encode(self.chain[block_id].to_dict())
+
+    def prove(self, block_id: int, tree_size: Optional[int] = None) -> Dict:
+        """
+        Доказательство включения блока: сам блок, путь в дереве Меркла
+        и корень дерева из tree_size блоков (по умолчанию - текущий корень).
+        """
+        with self.merkle.lock:
+            tree_size = len(self.merkle) if tree_size is None else tree_size
+            path = self.merkle.audit_path(block_id, tree_size)
+            root = self.merkle.root(tree_size)
+        return {
+            "block": self.get_block(block_id),
+            "leaf_index": block_id,
+            "tree_size": tree_size,
+            "root": root,
+            "path": path
+        }
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """Счетчики LRU-кэша блоков (только в ленивом режиме)"""
+        return self.chain.cache.stats() if self.lazy else None
+
+    def find_diplomas(self, field: str, value: str) -> List[Dict]:
+        """Поиск блоков по полю диплома через вторичный индекс"""
+        return [self.get_block(block_id) for block_id in self.index.find(field, value)]
+
     def __len__(self):
         return len(self.chain)
 
@@ -0,0 +1,95 @@
+import math
+import os
+import struct
+from hashlib import blake2b
+from typing import Optional
+
+
+class BloomFilter:
+    """
+    Фильтр Блума: "точно нет" или "возможно есть" за k обращений к битам.
+
+    Размер подбирается по ожидаемому числу элементов capacity и
+    допустимой доле ложных срабатываний fp_rate. Позиции битов -
+    двойное хэширование по 128-битному BLAKE2b. height - сколько блоков
+    цепочки уже учтено; по нему после загрузки дочитываются новые блоки.
+    """
+
+    MAGIC = b"BLM1"
+    _HEADER = struct.Struct('<4sQIQdQQ')  # magic, bits, hashes, capacity, fp_rate, count, height
+
+    def __init__(self, capacity: int = 1000000, fp_rate: float = 0.001):
+        if capacity <= 0 or not 0 < fp_rate < 1:
+            raise ValueError("Invalid Bloom filter parameters")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.height = 0
+
+    def _positions(self, value: str):
+        digest = blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def estimated_fp_rate(self) -> float:
+        """Ожидаемая доля ложных срабатываний при текущем заполнении"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def save(self, path: str) -> None:
+        """Атомарная запись на диск"""
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(self._HEADER.pack(
+                self.MAGIC, self.num_bits, self.num_hashes, self.capacity,
+                self.fp_rate, self.count, self.height
+            ))
+            f.write(self.bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['BloomFilter']:
+        """Загрузка с диска; None если файла нет или он поврежден"""
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            magic, num_bits, num_hashes, capacity, fp_rate, count, height = cls._HEADER.unpack_from(raw)
+        except (OSError, struct.error):
+            return None
+
+        bits = raw[cls._HEADER.size:]
+        if magic != cls.MAGIC or len(bits) != (num_bits + 7) // 8:
+            return None
+
+        bloom = cls.__new__(cls)
+        bloom.capacity = capacity
+        bloom.fp_rate = fp_rate
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.bits = bytearray(bits)
+        bloom.count = count
+        bloom.height = height
+        return bloom
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "configured_fp_rate": self.fp_rate,
+            "estimated_fp_rate": self.estimated_fp_rate(),
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+            "memory_bytes": len(self.bits)
+        }
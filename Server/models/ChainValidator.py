@@ -0,0 +1,109 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import chain as chain_iter
+from typing import Callable, Dict, List, Optional, Tuple
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.backends import default_backend
+from .Block import Block
+from .DiplomaGenerator import DiplomaGenerator
+
+
+@dataclass
+class BlockCheckResult:
+    id: int
+    hash: str
+    prev_hash: str
+    hash_valid: bool
+    difficulty_valid: bool
+    signature_valid: Optional[bool] = None  # None - проверка подписи пропущена
+
+    @property
+    def valid(self) -> bool:
+        return self.hash_valid and self.difficulty_valid and self.signature_valid is not False
+
+
+def check_records(items: List[Tuple[int, bytes, bool]]) -> List[BlockCheckResult]:
+    """
+    Независимые проверки блоков: пересчет хэша, сложность, подпись.
+    items - список (позиция, сериализованный блок, проверять ли подпись).
+    Выполняется в процессе-воркере.
+    """
+    results = []
+    for position, payload, check_signature in items:
+        try:
+            block = Block.from_dict(json.loads(payload), trusted=True)
+            results.append(BlockCheckResult(
+                id=block.id,
+                hash=block.hash,
+                prev_hash=block.prev_hash,
+                hash_valid=block.hash == block.calculate_hash(use_cache=False),
+                difficulty_valid=block.hash.startswith('0' * block.difficulty),
+                signature_valid=block.verify_diploma() if check_signature else None
+            ))
+        except Exception:
+            results.append(BlockCheckResult(position, "", "", False, False, False))
+    return results
+
+
+def check_diplomas(items: List[Tuple[dict, str]]) -> List[bool]:
+    """
+    Проверка подписей дипломов. items - список (diploma_data с подписью,
+    PEM открытого ключа); каждый ключ разбирается один раз на шард.
+    Выполняется в процессе-воркере.
+    """
+    keys: Dict[str, object] = {}
+    results = []
+    for diploma_data, public_key_pem in items:
+        try:
+            public_key = keys.get(public_key_pem)
+            if public_key is None:
+                public_key = serialization.load_pem_public_key(
+                    public_key_pem.encode('utf-8'),
+                    backend=default_backend()
+                )
+                keys[public_key_pem] = public_key
+            results.append(DiplomaGenerator(dict(diploma_data)).verify(public_key))
+        except Exception:
+            results.append(False)
+    return results
+
+
+class ChainValidator:
+    """
+    Распределяет проверку блоков по пулу процессов.
+    Проверка связности prev_hash выполняется в родительском процессе.
+    """
+
+    def __init__(self, workers: Optional[int] = None, shards_per_worker: int = 4):
+        self.workers = workers or os.cpu_count() or 1
+        self.shards_per_worker = shards_per_worker
+
+    def check(self, items: List[Tuple[int, bytes, bool]]) -> List[BlockCheckResult]:
+        """Возвращает результаты проверки в порядке items"""
+        return self._map(check_records, items)
+
+    def check_diplomas(self, items: List[Tuple[dict, str]]) -> List[bool]:
+        """Проверяет подписи дипломов, результаты в порядке items"""
+        return self._map(check_diplomas, items)
+
+    def _map(self, check: Callable[[list], list], items: list) -> list:
+        if self.workers <= 1 or len(items) < 2:
+            return check(items)
+
+        shard_count = min(len(items), self.workers * self.shards_per_worker)
+        shard_size = -(-len(items) // shard_count)
+        shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(shards))) as pool:
+            return list(chain_iter.from_iterable(pool.map(check, shards)))
+
+    @staticmethod
+    def check_linkage(results: List[BlockCheckResult], prev_hash: Optional[str] = None) -> bool:
+        """Последовательная проверка prev_hash по результатам воркеров"""
+        for result in results:
+            if prev_hash is not None and result.prev_hash != prev_hash:
+                return False
+            prev_hash = result.hash
+        return True
@@ -0,0 +1,37 @@
+from typing import Dict, List
+
+
+class DiplomaIndex:
+    """
+    Вторичные hash-индексы по полям диплома: значение поля -> id блоков.
+    full_name нормализуется (регистр, повторные пробелы).
+    """
+
+    FIELDS = ('reg_number', 'institution', 'full_name')
+
+    def __init__(self):
+        self._indexes: Dict[str, Dict[str, List[int]]] = {field: {} for field in self.FIELDS}
+
+    @staticmethod
+    def normalize(field: str, value) -> str:
+        value = ' '.join(str(value).split())
+        if field == 'full_name':
+            return value.casefold()
+        return value
+
+    def add(self, block_id: int, diploma_data: dict) -> None:
+        """Добавляет блок во все индексы"""
+        for field in self.FIELDS:
+            if field in diploma_data:
+                key = self.normalize(field, diploma_data[field])
+                self._indexes[field].setdefault(key, []).append(block_id)
+
+    def find(self, field: str, value: str) -> List[int]:
+        """Возвращает id блоков с данным значением поля"""
+        if field not in self._indexes:
+            raise ValueError(f"Unknown index field: {field}")
+        return list(self._indexes[field].get(self.normalize(field, value), ()))
+
+    def clear(self) -> None:
+        for index in self._indexes.values():
+            index.clear()
@@ -0,0 +1,73 @@
+from typing import Iterator
+from .Block import Block
+from .BlockStorage import BlockStorage
+from ..utils.lru_cache import LRUCache
+
+
+class LazyChain:
+    """
+    Заменитель списка блоков для Blockchain в ленивом режиме.
+
+    В памяти постоянно хранятся только заголовки (hash, prev_hash) в
+    компактных bytearray по 32 байта на хэш; id блока равен его позиции.
+    Полные блоки подгружаются из BlockStorage по обращению через
+    ограниченный LRU-кэш.
+    """
+
+    HASH_SIZE = 32
+
+    def __init__(self, storage: BlockStorage, cache_size: int = 1024):
+        self.storage = storage
+        self.cache = LRUCache(max_items=cache_size)
+        self._hashes = bytearray()
+        self._prev_hashes = bytearray()
+        # Блоки, добавленные в цепочку, но еще не записанные в хранилище
+        self._unflushed = {}
+
+    def append_header(self, block_hash: str, prev_hash: str) -> None:
+        self._hashes += bytes.fromhex(block_hash)
+        self._prev_hashes += bytes.fromhex(prev_hash)
+
+    def append(self, block: Block) -> None:
+        self.append_header(block.hash, block.prev_hash)
+        self._unflushed[len(self) - 1] = block
+        self.cache.put(len(self) - 1, block)
+
+    def release(self, position: int) -> None:
+        """Блок на позиции записан в хранилище и может вытесняться из памяти"""
+        self._unflushed.pop(position, None)
+
+    def _position(self, index: int) -> int:
+        position = index + len(self) if index < 0 else index
+        if position < 0 or position >= len(self):
+            raise IndexError("Block index out of range")
+        return position
+
+    def hash_at(self, index: int) -> str:
+        start = self._position(index) * self.HASH_SIZE
+        return self._hashes[start:start + self.HASH_SIZE].hex()
+
+    def prev_hash_at(self, index: int) -> str:
+        start = self._position(index) * self.HASH_SIZE
+        return self._prev_hashes[start:start + self.HASH_SIZE].hex()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        position = self._position(index)
+        block = self.cache.get(position) or self._unflushed.get(position)
+        if block is None:
+            block = Block.from_dict(self.storage.read(position), trusted=True)
+            self.cache.put(position, block)
+        return block
+
+    def __iter__(self) -> Iterator[Block]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def __len__(self) -> int:
+        return len(self._hashes) // self.HASH_SIZE
+
+    def __repr__(self) -> str:
+        return f"LazyChain({len(self)} headers, cached={len(self.cache)})"
@@ -0,0 +1,115 @@
+import threading
+from hashlib import sha256
+from typing import List, Optional
+
+
+class MerkleTree:
+    """
+    Инкрементальное дерево Меркла над хэшами блоков (схема RFC 6962).
+
+    Лист - SHA-256(0x00 || хэш блока), узел - SHA-256(0x01 || левый || правый);
+    дерево из n листьев делится по наибольшей степени двойки, меньшей n.
+    Хранятся все узлы полных поддеревьев: levels[k] - корни выровненных
+    поддеревьев из 2^k листьев, упакованные по 32 байта. Добавление листа
+    стоит O(log n), путь включения для любого размера дерева <= n - O(log n)
+    узлов, поэтому доказательство можно строить и для ранее опубликованного корня.
+    """
+
+    HASH_SIZE = 32
+
+    def __init__(self):
+        self.levels: List[bytearray] = [bytearray()]
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def leaf_hash(block_hash: str) -> bytes:
+        return sha256(b"\x00" + bytes.fromhex(block_hash)).digest()
+
+    @staticmethod
+    def node_hash(left: bytes, right: bytes) -> bytes:
+        return sha256(b"\x01" + left + right).digest()
+
+    def _node(self, level: int, index: int) -> bytes:
+        start = index * self.HASH_SIZE
+        return bytes(self.levels[level][start:start + self.HASH_SIZE])
+
+    def append(self, block_hash: str) -> None:
+        """Добавляет лист и достраивает завершенные им поддеревья"""
+        with self.lock:
+            node = self.leaf_hash(block_hash)
+            level = 0
+            while True:
+                self.levels[level] += node
+                count = len(self.levels[level]) // self.HASH_SIZE
+                if count % 2:
+                    break
+                node = self.node_hash(self._node(level, count - 2), node)
+                level += 1
+                if level == len(self.levels):
+                    self.levels.append(bytearray())
+
+    def __len__(self) -> int:
+        return len(self.levels[0]) // self.HASH_SIZE
+
+    def _subtree_root(self, start: int, size: int) -> bytes:
+        """Корень поддерева листьев [start, start + size)"""
+        if size & (size - 1) == 0:
+            level = size.bit_length() - 1
+            return self._node(level, start >> level)
+        split = 1 << (size - 1).bit_length() - 1
+        return self.node_hash(
+            self._subtree_root(start, split),
+            self._subtree_root(start + split, size - split)
+        )
+
+    def root(self, tree_size: Optional[int] = None) -> str:
+        """Корень дерева из первых tree_size листьев (по умолчанию - всех)"""
+        with self.lock:
+            tree_size = len(self) if tree_size is None else tree_size
+            if not 0 <= tree_size <= len(self):
+                raise ValueError("Invalid tree size")
+            if tree_size == 0:
+                return sha256(b"").hexdigest()
+            return self._subtree_root(0, tree_size).hex()
+
+    def audit_path(self, index: int, tree_size: Optional[int] = None) -> List[str]:
+        """Путь включения листа index в дерево из tree_size листьев (от листа к корню)"""
+        with self.lock:
+            tree_size = len(self) if tree_size is None else tree_size
+            if not 0 < tree_size <= len(self) or not 0 <= index < tree_size:
+                raise ValueError("Invalid leaf index or tree size")
+
+            path = []
+            start, size = 0, tree_size
+            while size > 1:
+                split = 1 << (size - 1).bit_length() - 1
+                if index - start < split:
+                    path.append(self._subtree_root(start + split, size - split))
+                    size = split
+                else:
+                    path.append(self._subtree_root(start, split))
+                    start, size = start + split, size - split
+            return [node.hex() for node in reversed(path)]
+
+    @classmethod
+    def verify_path(cls, block_hash: str, index: int, tree_size: int, path: List[str], root: str) -> bool:
+        """Проверка пути включения (RFC 9162, 2.1.3.2)"""
+        if not 0 <= index < tree_size:
+            return False
+        fn, sn = index, tree_size - 1
+        node = cls.leaf_hash(block_hash)
+        for sibling_hex in path:
+            sibling = bytes.fromhex(sibling_hex)
+            if sn == 0:
+                return False
+            if fn & 1 or fn == sn:
+                node = cls.node_hash(sibling, node)
+                if not fn & 1:
+                    while not fn & 1 and fn != 0:
+                        fn >>= 1
+                        sn >>= 1
+            else:
+                node = cls.node_hash(node, sibling)
+            fn >>= 1
+            sn >>= 1
+        return sn == 0 and node.hex() == root
@@ -0,0 +1,65 @@
+import math
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class MinerStats:
+    """
+    Hash rate reported by miners, smoothed with an exponential moving average.
+    """
+
+    def __init__(self, smoothing: float = 0.3, stale_seconds: int = 300):
+        """
+        :param smoothing: EMA weight of the newest report (0..1]
+        :param stale_seconds: Reports older than this are ignored in totals
+        """
+        self.smoothing = smoothing
+        self.stale_seconds = stale_seconds
+        self.hash_rates: Dict[str, float] = {}
+        self.last_seen: Dict[str, datetime] = {}
+        self.range_sizes: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def report(self, miner_id: str, hash_rate: float) -> float:
+        """Record a hash rate sample and return the smoothed value"""
+        if not math.isfinite(hash_rate) or hash_rate < 0:
+            raise ValueError("Hash rate must be a non-negative number")
+        with self.lock:
+            previous = self.hash_rates.get(miner_id)
+            if previous is None:
+                smoothed = hash_rate
+            else:
+                smoothed = self.smoothing * hash_rate + (1 - self.smoothing) * previous
+            self.hash_rates[miner_id] = smoothed
+            self.last_seen[miner_id] = datetime.now()
+            return smoothed
+
+    def get(self, miner_id: str) -> Optional[float]:
+        """Smoothed hash rate of a miner, None if unknown or stale"""
+        with self.lock:
+            seen = self.last_seen.get(miner_id)
+            if seen is None or (datetime.now() - seen).total_seconds() > self.stale_seconds:
+                return None
+            return self.hash_rates[miner_id]
+
+    def set_range_size(self, miner_id: str, size: int) -> None:
+        """Remember the size of the last range leased to a miner"""
+        with self.lock:
+            self.range_sizes[miner_id] = size
+
+    def get_range_size(self, miner_id: str) -> Optional[int]:
+        with self.lock:
+            return self.range_sizes.get(miner_id)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Hash rates of all miners with fresh reports"""
+        now = datetime.now()
+        with self.lock:
+            return {
+                miner_id: rate for miner_id, rate in self.hash_rates.items()
+                if (now - self.last_seen[miner_id]).total_seconds() <= self.stale_seconds
+            }
+
+    def total(self) -> float:
+        return sum(self.snapshot().values())
@@ -1,9 +1,13 @@
-from datetime import datetime
-from typing import Optional, Dict, Tuple, Any
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Tuple, Any, List
 from ..models import Block
+import heapq
 import threading
 
 class MiningTask:
+    MIN_RANGE_SIZE = 10000
+    MAX_RANGE_SIZE = 2 ** 31
+
     def __init__(
             self,
             block: Block,
@@ -32,28 +36,109 @@ class MiningTask:
         self.created_at = created_at or datetime.now()
         self.started_at = started_at
         self.base_nonce = base_nonce
+        # Allocation frontier: nonces below it were leased at least once
+        self.next_nonce = max(
+            [base_nonce + 1] + [end + 1 for (start, end) in self.assigned_miners.values()]
+        )
+        self.lease_started_at: Dict[str, datetime] = {
+            miner_id: self.created_at for miner_id in self.assigned_miners
+        }
+        self.searched_ranges: List[Tuple[int, int]] = []
+        # Min-heap of reclaimed (start, end) ranges, reused before the frontier
+        self.free_ranges: List[Tuple[int, int]] = []
+        # Min-heap of (started_at, miner_id, range) for expiry sweeps;
+        # entries for released leases are skipped lazily
+        self._lease_heap: List[Tuple[datetime, str, Tuple[int, int]]] = [
+            (self.created_at, miner_id, nonce_range)
+            for miner_id, nonce_range in self.assigned_miners.items()
+        ]
+        heapq.heapify(self._lease_heap)
+        self.reclaimed_nonces = 0
         self.lock = threading.Lock()  # For thread-safe operations
 
     @property
     def current_max_nonce(self) -> int:
         """Get the highest allocated nonce value"""
-        if not self.assigned_miners:
-            return self.base_nonce
-        return max(end for (start, end) in self.assigned_miners.values())
+        return self.next_nonce - 1
 
     def get_next_nonce_range(self, range_size: int = 10000) -> Tuple[int, int]:
-        """Calculate next available nonce range"""
+        """Calculate next available nonce range (without allocating it)"""
+        if self.free_ranges:
+            start, end = self.free_ranges[0]
+            return start, min(end, start + range_size - 1)
         next_start = self.current_max_nonce + 1
         return next_start, next_start + range_size - 1
 
-    def assign_to_miner(self, miner_id: str, range_size: int = 10000) -> bool:
-        """Assign a new nonce range to a miner"""
+    def _allocate_range(self, range_size: int) -> Tuple[int, int]:
+        """
+        Take the lowest reclaimed range (split if larger than range_size),
+        or extend the frontier. O(log n) in the number of free ranges.
+        """
+        if self.free_ranges:
+            start, end = heapq.heappop(self.free_ranges)
+            if end - start + 1 > range_size:
+                heapq.heappush(self.free_ranges, (start + range_size, end))
+                end = start + range_size - 1
+            return start, end
+
+        start = self.next_nonce
+        self.next_nonce = start + range_size
+        return start, start + range_size - 1
+
+    def _release_lease(self, miner_id: str) -> Tuple[int, int]:
+        """Drop a miner's lease and return its range to the free list"""
+        nonce_range = self.assigned_miners.pop(miner_id)
+        self.lease_started_at.pop(miner_id, None)
+        heapq.heappush(self.free_ranges, nonce_range)
+        self.reclaimed_nonces += nonce_range[1] - nonce_range[0] + 1
+        return nonce_range
+
+    def adaptive_range_size(
+            self,
+            hash_rate: float,
+            target_seconds: float,
+            previous_size: Optional[int] = None
+    ) -> int:
+        """
+        Size a nonce range so that a miner at hash_rate works on it for
+        about target_seconds.
+
+        :param hash_rate: Miner hash rate, hashes per second
+        :param target_seconds: Desired lease duration
+        :param previous_size: Miner's previous range size; the new size is
+            kept within x2 of it so ranges grow and shrink gradually
+        """
+        size = hash_rate * target_seconds
+        if previous_size:
+            size = max(previous_size / 2, min(size, previous_size * 2))
+        return int(max(self.MIN_RANGE_SIZE, min(size, self.MAX_RANGE_SIZE)))
+
+    def assign_to_miner(
+            self,
+            miner_id: str,
+            range_size: int = 10000,
+            hash_rate: Optional[float] = None,
+            target_seconds: Optional[float] = None
+    ) -> bool:
+        """
+        Assign a new nonce range to a miner.
+
+        :param range_size: Fixed range size, or the previous size when hash_rate is given
+        :param hash_rate: Miner hash rate; enables adaptive sizing together with target_seconds
+        :param target_seconds: Target lease duration for adaptive sizing
+        """
+        if hash_rate and target_seconds:
+            range_size = self.adaptive_range_size(hash_rate, target_seconds, range_size)
+
         with self.lock:
             if miner_id in self.assigned_miners:
                 return False  # Miner already has a range
 
-            new_range = self.get_next_nonce_range(range_size)
+            new_range = self._allocate_range(range_size)
+            started_at = datetime.now()
             self.assigned_miners[miner_id] = new_range
+            self.lease_started_at[miner_id] = started_at
+            heapq.heappush(self._lease_heap, (started_at, miner_id, new_range))
             print(self.assigned_miners)
             # Update task status if first assignment
             if self.status == "pending":
@@ -66,9 +151,40 @@ class MiningTask:
         """Get assigned range for a specific miner"""
         return self.assigned_miners.get(miner_id)
 
+    def is_issued_nonce(self, nonce: int) -> bool:
+        """Whether nonce lies in a range that has been leased at least once"""
+        return self.base_nonce < nonce <= self.current_max_nonce
+
+    def complete_range(self, miner_id: str, start: int, end: int) -> Optional[float]:
+        """
+        Mark a miner's leased range as fully searched and release the lease.
+
+        :return: Lease duration in seconds, or None if (start, end) is not
+            the range currently leased to this miner
+        """
+        with self.lock:
+            if self.assigned_miners.get(miner_id) != (start, end):
+                return None
+            del self.assigned_miners[miner_id]
+            started_at = self.lease_started_at.pop(miner_id)
+            self.searched_ranges.append((start, end))
+            return (datetime.now() - started_at).total_seconds()
+
+    @property
+    def searched_nonces(self) -> int:
+        """Number of nonces reported as searched without a solution"""
+        return sum(end - start + 1 for (start, end) in self.searched_ranges)
+
+    def release_miner(self, miner_id: str) -> Optional[Tuple[int, int]]:
+        """Return an abandoned lease to the free list"""
+        with self.lock:
+            if miner_id not in self.assigned_miners:
+                return None
+            return self._release_lease(miner_id)
+
     def is_fully_assigned(self, total_range: int = 2 ** 32) -> bool:
         """Check if all possible nonce values are assigned"""
-        return self.current_max_nonce >= total_range - 1
+        return not self.free_ranges and self.current_max_nonce >= total_range - 1
 
     def is_expired(self, timeout_seconds: int) -> bool:
         """Check if the task has exceeded processing time"""
@@ -76,19 +192,27 @@ class MiningTask:
             return False
         return (datetime.now() - self.started_at).total_seconds() > timeout_seconds
 
-    def reset_expired_ranges(self, timeout_seconds: int):
-        """Reset ranges that haven't been completed in time"""
+    def reset_expired_ranges(self, timeout_seconds: int) -> List[Tuple[int, int]]:
+        """
+        Reclaim leases older than timeout_seconds (by each lease's own start
+        time) into the free list.
+
+        :return: Reclaimed nonce ranges
+        """
+        cutoff = datetime.now() - timedelta(seconds=timeout_seconds)
+        reclaimed = []
         with self.lock:
-            expired_miners = [
-                miner_id for miner_id, (start, end) in self.assigned_miners.items()
-                if (datetime.now() - self.started_at).total_seconds() > timeout_seconds
-            ]
-            for miner_id in expired_miners:
-                del self.assigned_miners[miner_id]
+            while self._lease_heap and self._lease_heap[0][0] < cutoff:
+                started_at, miner_id, nonce_range = heapq.heappop(self._lease_heap)
+                # Skip stale heap entries of completed or replaced leases
+                if (self.assigned_miners.get(miner_id) == nonce_range and
+                        self.lease_started_at.get(miner_id) == started_at):
+                    reclaimed.append(self._release_lease(miner_id))
+        return reclaimed
 
     def __repr__(self) -> str:
         """Debug-friendly representation"""
         return (
             f"status={self.status} miners={len(self.assigned_miners)} "
-            f"current_max_nonce={self.current_max_nonce}>"
+            f"current_max_nonce={self.current_max_nonce} free_ranges={len(self.free_ranges)}>"
         )
\ No newline at end of file
@@ -3,6 +3,16 @@ from .User import User
 from .MiningTask import MiningTask
 from .Blockchain import Blockchain
 from .Block import Block
+from .BlockStorage import BlockStorage
+from .BlockWriter import BlockWriter
+from .ChainValidator import ChainValidator
+from .DiplomaIndex import DiplomaIndex
+from .LazyChain import LazyChain
+from .MinerStats import MinerStats
+from .MerkleTree import MerkleTree
+from .BloomFilter import BloomFilter
 
 __all__ = ['User', 'MiningTask', 'Blockchain',
-           'DiplomaGenerator', 'Block']
\ No newline at end of file
+           'DiplomaGenerator', 'Block', 'BlockStorage', 'BlockWriter',
+           'ChainValidator', 'DiplomaIndex', 'LazyChain',
+           'MinerStats', 'MerkleTree', 'BloomFilter']
\ No newline at end of file
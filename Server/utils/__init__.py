@@ -1,5 +1,8 @@
 from .response_formatter import *
 from .validators import *
+from .lru_cache import LRUCache
+from .event_bus import EventBus, EVENT_TYPES
 
 __all__ = ['format_response', 'format_error', 'validate_block_data',
-           'validate_credentials']
\ No newline at end of file
+           'validate_credentials', 'LRUCache',
+           'EventBus', 'EVENT_TYPES']
\ No newline at end of file
@@ -0,0 +1,58 @@
+import itertools
+import threading
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+from .response_formatter import format_response
+
+EVENT_TYPES = ("BLOCK_COMMITTED", "TASK_INVALIDATED", "QUEUE_CHANGED")
+
+
+class EventBus:
+    """
+    Рассылка серверных событий подписчикам SUBSCRIBE.
+
+    Подписчик - функция, принимающая готовое сообщение (bytes) формата
+    "EVENT <TYPE>\\r\\n{"data": ...}\\r\\n\\r\\n". Она должна только ставить
+    сообщение в очередь: publish вызывается в том числе под общим lock.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Tuple[Callable[[bytes], None], Optional[Set[str]]]] = {}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(
+            self,
+            deliver: Callable[[bytes], None],
+            event_types: Optional[Iterable[str]] = None
+    ) -> int:
+        """Регистрирует подписчика. Возвращает идентификатор подписки"""
+        types = set(event_types) if event_types else None
+        if types and not types <= set(EVENT_TYPES):
+            raise ValueError(f"Unknown event types: {', '.join(sorted(types - set(EVENT_TYPES)))}")
+        with self._lock:
+            subscription_id = next(self._counter)
+            self._subscribers[subscription_id] = (deliver, types)
+            return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> None:
+        with self._lock:
+            self._subscribers.pop(subscription_id, None)
+
+    def publish(self, event_type: str, data: dict) -> None:
+        """Отправляет событие всем подписчикам этого типа"""
+        message = format_response(event_type, data, status="EVENT").encode('utf-8')
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        self.published += 1
+
+        for subscription_id, (deliver, types) in subscribers:
+            if types and event_type not in types:
+                continue
+            try:
+                deliver(message)
+            except Exception:
+                self.unsubscribe(subscription_id)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением по числу элементов
+    и (опционально) по суммарному размеру.
+    Считает попадания, промахи и вытеснения.
+    """
+
+    def __init__(
+            self,
+            max_items: Optional[int] = 1024,
+            max_size: Optional[int] = None,
+            sizeof: Callable[[Any], int] = lambda value: 1,
+            on_evict: Optional[Callable[[Hashable, Any], None]] = None
+    ):
+        self.max_items = max_items
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        evicted = []
+        with self._lock:
+            if key in self._items:
+                self.size -= self.sizeof(self._items.pop(key))
+            self._items[key] = value
+            self.size += self.sizeof(value)
+
+            while self._items and (
+                    (self.max_items is not None and len(self._items) > self.max_items) or
+                    (self.max_size is not None and self.size > self.max_size)
+            ):
+                old_key, old_value = self._items.popitem(last=False)
+                self.size -= self.sizeof(old_value)
+                self.evictions += 1
+                evicted.append((old_key, old_value))
+
+        if self.on_evict:
+            for old_key, old_value in evicted:
+                self.on_evict(old_key, old_value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
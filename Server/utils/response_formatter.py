@@ -35,15 +35,28 @@ def format_help(authenticated: bool, role: str = None) -> str:
     help_msg = {
         "basic": [
             "VIEW_BLOCK <id> - View block by ID",
-            "HELP - Show this message"
+            "VIEW_BLOCKS <from> <to> [fields=a,b|header] - Stream blocks as NDJSON",
+            "PROVE <id> [tree_size] - Merkle inclusion proof for a block",
+            "EXISTS <reg_number> - Check whether a diploma is on the chain",
+            "FIND_DIPLOMA <reg_number|institution|full_name> <value> - Find diploma blocks",
+            "SUBSCRIBE [event types] - Stream BLOCK_COMMITTED, TASK_INVALIDATED, QUEUE_CHANGED events",
+            "HELP - Show this message",
+            "LOGIN <user> <password> - Get session token",
+            "AUTH <token> - Authorize following commands with session token",
+            "LOGOUT - End session (after AUTH <token>)"
         ],
         "admin": [
             "ADD_BLOCK <json_data> - Add new block to queue",
-            "LIST_QUEUE - Show pending blocks"
+            "ADD_BLOCKS <json_array | ndjson> - Add a batch of blocks, per-item status",
+            "LIST_QUEUE - Show pending blocks",
+            "STATS - Show server cache statistics",
+            "RELOAD_USERS - Reload users.json"
         ],
         "miner": [
             "MINE - Get mining task",
-            "SUBMIT_SOLUTION <hash> - Submit block solution"
+            "SUBMIT_SOLUTION <hash> - Submit block solution",
+            "RANGE_DONE <start> <end> - Report searched range and get a new one",
+            "REPORT_HASHRATE <hashes_per_sec> - Report measured hash rate"
         ]
     }
 
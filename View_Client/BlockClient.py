@@ -2,6 +2,41 @@ import socket
 import json
 import argparse
 import sys
+from hashlib import sha256
+
+
+def block_hash(block: dict) -> str:
+    """Recompute a block hash from its fields, as the server does"""
+    info = (
+            str(block["prev_hash"]) +
+            str(block["timestamp"]) +
+            json.dumps(block["diploma_data"], sort_keys=True) +
+            block["public_key"] +
+            block["signature"]
+    )
+    return sha256((info + str(block["nonce"]) + str(block["difficulty"])).encode('utf-8')).hexdigest()
+
+
+def verify_inclusion(block_hex: str, index: int, tree_size: int, path: list, root: str) -> bool:
+    """Check a Merkle audit path (RFC 6962 tree, RFC 9162 verification)"""
+    if not 0 <= index < tree_size:
+        return False
+    fn, sn = index, tree_size - 1
+    node = sha256(b"\x00" + bytes.fromhex(block_hex)).digest()
+    for sibling_hex in path:
+        sibling = bytes.fromhex(sibling_hex)
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            node = sha256(b"\x01" + sibling + node).digest()
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            node = sha256(b"\x01" + node + sibling).digest()
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and node.hex() == root
 
 
 class BlockClient:
@@ -76,13 +111,92 @@ class BlockClient:
         """View a specific block from the blockchain"""
         return self.send_command(f"VIEW_BLOCK {block_id}")
 
+    def find_diploma(self, field: str, value: str) -> dict:
+        """Find diploma blocks by reg_number, institution or full_name"""
+        return self.send_command(f"FIND_DIPLOMA {field} {value}")
+
+    def exists(self, reg_number: str) -> dict:
+        """Check whether a diploma with this registration number is on the chain"""
+        return self.send_command(f"EXISTS {reg_number}")
+
+    def prove(self, block_id: int, tree_size: int = None) -> dict:
+        """Request a Merkle inclusion proof for a block"""
+        command = f"PROVE {block_id}" + (f" {tree_size}" if tree_size is not None else "")
+        return self.send_command(command)
+
+    @staticmethod
+    def verify_proof(proof: dict, trusted_root: str = None) -> bool:
+        """
+        Offline check of a PROVE response: the block hash must match the
+        block contents and the audit path must lead to the root. Pass the
+        root published for proof["tree_size"] as trusted_root; otherwise the
+        root from the response itself is used.
+        """
+        block = proof["block"]
+        computed = block_hash(block)
+        if computed != block["hash"] or block["id"] != proof["leaf_index"]:
+            return False
+        root = trusted_root or proof["root"]
+        return verify_inclusion(computed, proof["leaf_index"], proof["tree_size"], proof["path"], root)
+
+    def view_blocks(self, start: int, end: int, fields=None):
+        """
+        Fetch blocks [start, end] over one connection with VIEW_BLOCKS and
+        yield them as dicts. fields - list of block fields or "header"
+        """
+        command = f"VIEW_BLOCKS {start} {end}"
+        if fields:
+            command += " fields=" + (fields if isinstance(fields, str) else ",".join(fields))
+
+        with self.connect() as sock:
+            sock.sendall(f"{command}\r\n\r\n".encode('utf-8'))
+            stream = sock.makefile('rb')
+
+            # Header: status line and JSON with the number of blocks
+            status = stream.readline().decode('utf-8').strip()
+            body = stream.readline().decode('utf-8').strip()
+            stream.readline()
+            if not status.startswith("OK"):
+                raise ValueError(f"{status}: {body}")
+
+            for _ in range(json.loads(body)['data']['count']):
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError("Stream closed before all blocks were received")
+                yield json.loads(line)
+
+    def subscribe(self, event_types=None):
+        """
+        Subscribe to server events (BLOCK_COMMITTED, TASK_INVALIDATED,
+        QUEUE_CHANGED) and yield them as parsed responses
+        """
+        command = " ".join(["SUBSCRIBE"] + list(event_types or []))
+        with self.connect() as sock:
+            sock.sendall(f"{command}\r\n\r\n".encode('utf-8'))
+            buffer = b""
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    return
+                buffer += chunk
+                while b"\r\n\r\n" in buffer:
+                    raw, sep, buffer = buffer.partition(b"\r\n\r\n")
+                    yield self.parse_response(raw.decode('utf-8'))
+
 
 def main():
     parser = argparse.ArgumentParser(description='Blockchain Client')
     parser.add_argument('--host', default='localhost', help='Server hostname')
     parser.add_argument('--port', type=int, default=65432, help='Server port')
-    parser.add_argument('command', choices=['view_block'], help='Command to execute')
+    parser.add_argument('command', choices=['view_block', 'view_blocks', 'find_diploma', 'exists', 'prove', 'subscribe'], help='Command to execute')
     parser.add_argument('block_id', type=int, nargs='?', default=0, help='Block ID to view')
+    parser.add_argument('--field', default='reg_number',
+                        choices=['reg_number', 'institution', 'full_name'], help='Field to search by')
+    parser.add_argument('--value', help='Field value to search for')
+    parser.add_argument('--to', type=int, help='Last block ID for view_blocks (default: block_id)')
+    parser.add_argument('--fields', help='view_blocks projection: comma-separated fields or "header"')
+    parser.add_argument('--root', help='prove: trusted published Merkle root')
+    parser.add_argument('--tree-size', type=int, help='prove: tree size the trusted root was published for')
 
     args = parser.parse_args()
 
@@ -91,6 +205,37 @@ def main():
     if args.command == "view_block":
         response = client.view_block(args.block_id)
         print(json.dumps(response, indent=2, ensure_ascii=False))
+    elif args.command == "view_blocks":
+        end = args.to if args.to is not None else args.block_id
+        try:
+            for block in client.view_blocks(args.block_id, end, args.fields):
+                print(json.dumps(block, ensure_ascii=False))
+        except (ValueError, ConnectionError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    elif args.command == "prove":
+        response = client.prove(args.block_id, args.tree_size)
+        if response.get("status") != "OK":
+            print(json.dumps(response, indent=2, ensure_ascii=False))
+            sys.exit(1)
+        proof = response["data"]
+        valid = client.verify_proof(proof, args.root)
+        print(f"Block {proof['leaf_index']} in tree of {proof['tree_size']}: "
+              f"{'VALID' if valid else 'INVALID'} (root {args.root or proof['root']}, "
+              f"{len(proof['path'])} hashes)")
+        sys.exit(0 if valid else 1)
+    elif args.command == "exists":
+        response = client.exists(args.value)
+        print(json.dumps(response, indent=2, ensure_ascii=False))
+    elif args.command == "find_diploma":
+        response = client.find_diploma(args.field, args.value)
+        print(json.dumps(response, indent=2, ensure_ascii=False))
+    elif args.command == "subscribe":
+        try:
+            for event in client.subscribe():
+                print(json.dumps(event, ensure_ascii=False))
+        except KeyboardInterrupt:
+            pass
     else:
         print(f"Unknown command: {args.command}")
         sys.exit(1)